@@ -3,10 +3,11 @@ LangGraph agent module for workflow orchestration.
 Implements the state machine for transaction analysis workflows.
 """
 
-from app.agent.graph import create_workflow, execute_workflow
+from app.agent.graph import COMPILED_WORKFLOW, create_workflow, execute_workflow
 from app.agent.state import WorkflowState
 
 __all__ = [
+    "COMPILED_WORKFLOW",
     "WorkflowState",
     "create_workflow",
     "execute_workflow",
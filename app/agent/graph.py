@@ -4,11 +4,12 @@ Defines the graph structure and routing logic.
 """
 
 import logging
-from typing import Literal
+from typing import Literal, Optional
 from uuid import UUID
 
 from langgraph.graph import StateGraph, END, START
-from sqlalchemy.ext.asyncio import AsyncSession
+from langgraph.graph.state import CompiledStateGraph
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.agent.nodes import (
     WorkflowContext,
@@ -40,16 +41,20 @@ def confidence_router(state: WorkflowState) -> Literal["escalate", "finalize"]:
     - "escalate" if confidence is below threshold
     - "finalize" if confidence is acceptable
     """
-    if state.get("is_escalated", False):
+    # is_escalated is always present: the initial state defines it
+    if state["is_escalated"]:
         return "escalate"
     else:
         return "finalize"
 
 
-def create_workflow() -> StateGraph:
+def create_workflow() -> CompiledStateGraph:
     """
     Create and compile the LangGraph workflow.
     
+    Nodes read their WorkflowContext from ``config["configurable"]["context"]``,
+    so the compiled graph holds no per-run state and can be shared.
+    
     Returns:
         Compiled StateGraph ready for execution
     """
@@ -66,10 +71,13 @@ def create_workflow() -> StateGraph:
     graph.add_node("finalize", finalize)
     
     # Add edges (define workflow flow)
+    # ingest_transactions and detect_anomalies have no data dependency on each
+    # other, so they fan out from START and run concurrently. draft_explanation
+    # joins the two branches once both have written their state updates.
     graph.add_edge(START, "ingest_transactions")
-    graph.add_edge("ingest_transactions", "detect_anomalies")
+    graph.add_edge(START, "detect_anomalies")
     graph.add_edge("detect_anomalies", "retrieve_policies")
-    graph.add_edge("retrieve_policies", "draft_explanation")
+    graph.add_edge(["ingest_transactions", "retrieve_policies"], "draft_explanation")
     graph.add_edge("draft_explanation", "evaluate_confidence")
     
     # Conditional routing based on confidence
@@ -94,11 +102,42 @@ def create_workflow() -> StateGraph:
     return workflow
 
 
+# Default values for every state key; execute_workflow fills in the run-specific fields
+_INITIAL_STATE_TEMPLATE: WorkflowState = {
+    "workflow_run_id": "",
+    "customer_id": "",
+    "input_params": {},
+    "transaction_summary": {},
+    "anomalies": [],
+    "anomaly_count": 0,
+    "retrieved_policy_ids": [],
+    "retrieved_policy_titles": [],
+    "explanation": "",
+    "confidence_score": 0.0,
+    "recommended_actions": [],
+    "is_escalated": False,
+    "escalation_reason": "",
+    "final_result": {},
+    "errors": [],
+}
+
+
+# Compiled once per process and reused by every workflow run
+COMPILED_WORKFLOW = create_workflow()
+
+# The drafter holds no per-run state and caches its LLM client, so a single
+# instance serves every workflow. The database tools are bound to per-run
+# sessions and the registry/guardrails carry per-run counters, so those stay
+# per request.
+_EXPLANATION_DRAFTER = ExplanationDrafter()
+
+
 async def execute_workflow(
     workflow_run_id: UUID,
     customer_id: UUID,
     input_params: dict,
     session: AsyncSession,
+    session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
 ) -> dict:
     """
     Execute the workflow for a customer.
@@ -107,7 +146,9 @@ async def execute_workflow(
         workflow_run_id: Unique ID for this workflow execution
         customer_id: Customer to analyze
         input_params: Input parameters (e.g., analysis_window_days, anomaly_threshold)
-        session: Database session
+        session: Database session (used for audit logging)
+        session_factory: Factory for the per-branch sessions used by nodes that
+            run concurrently. Defaults to a factory bound to ``session``'s engine.
         
     Returns:
         Final workflow result dictionary
@@ -119,122 +160,71 @@ async def execute_workflow(
     guardrail_enforcer = GuardrailEnforcer()
     tool_registry = ToolRegistry(session, workflow_run_id, audit_logger, guardrail_enforcer)
     
-    # Register tools
-    transaction_analyzer = TransactionAnalyzer(session)
-    anomaly_detector = AnomalyDetector(session)
-    explanation_drafter = ExplanationDrafter()
+    # AsyncSession is not safe for concurrent use, so the parallel branches
+    # each get their own session from this factory.
+    if session_factory is None:
+        session_factory = async_sessionmaker(
+            session.bind,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
     
-    tool_registry.register_tool("transaction_analyzer", transaction_analyzer.execute)
-    tool_registry.register_tool("anomaly_detector", anomaly_detector.execute)
-    tool_registry.register_tool("explanation_drafter", explanation_drafter.execute)
+    # Register tools
+    async def analyze_transactions(input_data: dict) -> dict:
+        async with session_factory() as tool_session:
+            return await TransactionAnalyzer(
+                tool_session, window_end=tool_registry.window_end
+            ).execute(input_data)
+    
+    async def detect_transaction_anomalies(input_data: dict) -> dict:
+        async with session_factory() as tool_session:
+            return await AnomalyDetector(
+                tool_session, window_end=tool_registry.window_end
+            ).execute(input_data)
+    
+    tool_registry.register_tool("transaction_analyzer", analyze_transactions)
+    tool_registry.register_tool("anomaly_detector", detect_transaction_anomalies)
+    tool_registry.register_tool("explanation_drafter", _EXPLANATION_DRAFTER.execute)
     
     # Create workflow context
     context = WorkflowContext(
         session=session,
+        session_factory=session_factory,
         tool_registry=tool_registry,
         audit_logger=audit_logger,
         guardrail_enforcer=guardrail_enforcer,
     )
     
-    # Initialize state
-    initial_state: WorkflowState = {
-        "workflow_run_id": str(workflow_run_id),
-        "customer_id": str(customer_id),
-        "input_params": input_params,
-        "transactions": [],
-        "transaction_summary": {},
-        "anomalies": [],
-        "anomaly_count": 0,
-        "retrieved_policies": [],
-        "explanation": "",
-        "confidence_score": 0.0,
-        "recommended_actions": [],
-        "is_escalated": False,
-        "escalation_reason": "",
-        "final_result": {},
-        "errors": [],
-    }
-    
-    # Create and compile workflow
-    workflow = create_workflow()
-    
-    # Execute workflow with context injected into each node
-    # We need to wrap nodes to inject context
-    async def wrapped_node(node_func):
-        async def wrapper(state):
-            return await node_func(state, context)
-        return wrapper
-    
-    # Execute by invoking each node manually with our context
-    # LangGraph's ainvoke doesn't support passing additional args, so we use config
-    config = {"configurable": {"context": context}}
+    # Initialize state from the shared template. The shallow copy is safe:
+    # nodes return new values and never mutate state containers in place.
+    initial_state: WorkflowState = _INITIAL_STATE_TEMPLATE.copy()
+    initial_state["workflow_run_id"] = str(workflow_run_id)
+    initial_state["customer_id"] = str(customer_id)
+    initial_state["input_params"] = input_params
     
     try:
-        # For LangGraph 1.0, we need a different approach to pass context
-        # We'll use a closure-based approach instead
-        
-        # Recreate graph with context-bound nodes
-        graph = StateGraph(WorkflowState)
-        
-        # Create closures that capture context
-        async def node_ingest(state):
-            return await ingest_transactions(state, context)
-        
-        async def node_detect(state):
-            return await detect_anomalies(state, context)
-        
-        async def node_retrieve(state):
-            return await retrieve_policies(state, context)
-        
-        async def node_draft(state):
-            return await draft_explanation(state, context)
-        
-        async def node_evaluate(state):
-            return await evaluate_confidence(state, context)
-        
-        async def node_escalate(state):
-            return await escalate(state, context)
-        
-        async def node_finalize(state):
-            return await finalize(state, context)
-        
-        # Add nodes with closures
-        graph.add_node("ingest_transactions", node_ingest)
-        graph.add_node("detect_anomalies", node_detect)
-        graph.add_node("retrieve_policies", node_retrieve)
-        graph.add_node("draft_explanation", node_draft)
-        graph.add_node("evaluate_confidence", node_evaluate)
-        graph.add_node("escalate", node_escalate)
-        graph.add_node("finalize", node_finalize)
-        
-        # Add edges
-        graph.add_edge(START, "ingest_transactions")
-        graph.add_edge("ingest_transactions", "detect_anomalies")
-        graph.add_edge("detect_anomalies", "retrieve_policies")
-        graph.add_edge("retrieve_policies", "draft_explanation")
-        graph.add_edge("draft_explanation", "evaluate_confidence")
-        graph.add_conditional_edges(
-            "evaluate_confidence",
-            confidence_router,
-            {"escalate": "escalate", "finalize": "finalize"},
+        # The graph is compiled once at import; per-run resources reach the
+        # nodes through the configurable channel
+        final_state = await COMPILED_WORKFLOW.ainvoke(
+            initial_state,
+            config={"configurable": {"context": context}},
         )
-        graph.add_edge("escalate", "finalize")
-        graph.add_edge("finalize", END)
-        
-        # Compile and invoke
-        compiled_workflow = graph.compile()
-        final_state = await compiled_workflow.ainvoke(initial_state)
         
         logger.info(f"Workflow {workflow_run_id} completed successfully")
         
-        return final_state.get("final_result", {})
+        result = final_state.get("final_result", {})
         
     except Exception as e:
         logger.error(f"Workflow {workflow_run_id} failed: {e}")
         await audit_logger.log_error("workflow", e, initial_state)
         
-        return {
+        result = {
             "status": "failed",
             "error": str(e),
             "customer_id": str(customer_id),
         }
+    
+    # Persist the buffered audit trail in a single batch
+    await audit_logger.flush()
+    
+    return result
@@ -5,13 +5,16 @@ Each node performs a specific task in the workflow pipeline.
 
 import logging
 from typing import Any
+from uuid import UUID
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.agent.state import WorkflowState
 from app.audit.logger import AuditLogger
 from app.config import settings
 from app.guardrails.enforcement import GuardrailEnforcer
+from app.policies.loader import load_policy_excerpts
 from app.rag.retriever import retrieve_relevant_policies
 from app.tools.registry import ToolRegistry
 from app.tools.transaction_analyzer import TransactionAnalyzer
@@ -20,6 +23,13 @@ from app.tools.explanation_drafter import ExplanationDrafter
 
 logger = logging.getLogger(__name__)
 
+# Settings are loaded once at startup, so resolve the threshold at import
+_CONFIDENCE_THRESHOLD = settings.confidence_threshold
+
+# Policy retrieval parameters, shared with the startup cache warm-up
+_POLICY_TOP_K = 3
+NORMAL_MONITORING_QUERY = "Normal transaction monitoring policies"
+
 
 class WorkflowContext:
     """
@@ -29,23 +39,57 @@ class WorkflowContext:
     def __init__(
         self,
         session: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
         tool_registry: ToolRegistry,
         audit_logger: AuditLogger,
         guardrail_enforcer: GuardrailEnforcer,
     ):
         self.session = session
+        self.session_factory = session_factory
         self.tool_registry = tool_registry
         self.audit_logger = audit_logger
         self.guardrail_enforcer = guardrail_enforcer
 
 
-async def ingest_transactions(state: WorkflowState, context: WorkflowContext) -> dict:
+def get_context(config: RunnableConfig) -> WorkflowContext:
+    """
+    Extract the per-run WorkflowContext from the LangGraph runnable config.
+    
+    Args:
+        config: Runnable config passed to the node by LangGraph
+        
+    Returns:
+        WorkflowContext injected by execute_workflow
+    """
+    return config["configurable"]["context"]
+
+
+async def warm_policy_cache(session: AsyncSession) -> None:
+    """
+    Pre-populate the policy retrieval cache for the no-anomaly query.
+    
+    Runs at startup so that retrieve_policies answers the common case from
+    memory without embedding or database work.
+    
+    Args:
+        session: Database session
+    """
+    await retrieve_relevant_policies(
+        session=session,
+        query=NORMAL_MONITORING_QUERY,
+        top_k=_POLICY_TOP_K,
+        max_distance=settings.policy_max_distance,
+    )
+
+
+async def ingest_transactions(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 1: Ingest and analyze customer transactions.
     
     Uses the TransactionAnalyzer tool to get transaction statistics.
     """
     node_name = "ingest_transactions"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
@@ -63,12 +107,8 @@ async def ingest_transactions(state: WorkflowState, context: WorkflowContext) ->
             node_name=node_name,
         )
         
-        # Extract transaction details for downstream nodes
-        transactions = []
-        
         # Update state
         updates = {
-            "transactions": transactions,
             "transaction_summary": result,
         }
         
@@ -81,16 +121,17 @@ async def ingest_transactions(state: WorkflowState, context: WorkflowContext) ->
     except Exception as e:
         logger.error(f"Error in {node_name}: {e}")
         await context.audit_logger.log_error(node_name, e, state)
-        return {"errors": state.get("errors", []) + [f"{node_name}: {str(e)}"]}
+        return {"errors": [f"{node_name}: {str(e)}"]}
 
 
-async def detect_anomalies(state: WorkflowState, context: WorkflowContext) -> dict:
+async def detect_anomalies(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 2: Detect anomalous transactions.
     
     Uses the AnomalyDetector tool to identify suspicious patterns.
     """
     node_name = "detect_anomalies"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
@@ -123,16 +164,17 @@ async def detect_anomalies(state: WorkflowState, context: WorkflowContext) -> di
     except Exception as e:
         logger.error(f"Error in {node_name}: {e}")
         await context.audit_logger.log_error(node_name, e, state)
-        return {"errors": state.get("errors", []) + [f"{node_name}: {str(e)}"]}
+        return {"errors": [f"{node_name}: {str(e)}"]}
 
 
-async def retrieve_policies(state: WorkflowState, context: WorkflowContext) -> dict:
+async def retrieve_policies(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 3: Retrieve relevant policy documents via RAG.
     
     Uses pgvector similarity search to find applicable policies.
     """
     node_name = "retrieve_policies"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
@@ -146,29 +188,24 @@ async def retrieve_policies(state: WorkflowState, context: WorkflowContext) -> d
                 f"What policies apply to fraud detection and escalation?"
             )
         else:
-            query = "Normal transaction monitoring policies"
-        
-        # Retrieve policies
-        policies = await retrieve_relevant_policies(
-            session=context.session,
-            query=query,
-            top_k=3,
-        )
-        
-        # Convert to dict format
-        policy_dicts = [
-            {
-                "id": str(policy.id),
-                "title": policy.title,
-                "content": policy.content[:500],  # Truncate for brevity
-                "category": policy.category,
-            }
-            for policy in policies
-        ]
+            # Common path: served from the cache warmed at startup
+            query = NORMAL_MONITORING_QUERY
+        
+        # Retrieve policies on a dedicated session: this node runs while
+        # ingest_transactions may still be using the database. The session
+        # only checks out a connection on a cache miss.
+        async with context.session_factory() as session:
+            policies = await retrieve_relevant_policies(
+                session=session,
+                query=query,
+                top_k=_POLICY_TOP_K,
+                max_distance=settings.policy_max_distance,
+            )
         
-        # Update state
+        # Keep only references in state; draft_explanation loads the content
         updates = {
-            "retrieved_policies": policy_dicts,
+            "retrieved_policy_ids": [str(policy.id) for policy in policies],
+            "retrieved_policy_titles": [policy.title for policy in policies],
         }
         
         await context.audit_logger.log_node_completion(
@@ -181,27 +218,38 @@ async def retrieve_policies(state: WorkflowState, context: WorkflowContext) -> d
         logger.error(f"Error in {node_name}: {e}")
         await context.audit_logger.log_error(node_name, e, state)
         return {
-            "retrieved_policies": [],
-            "errors": state.get("errors", []) + [f"{node_name}: {str(e)}"],
+            "retrieved_policy_ids": [],
+            "retrieved_policy_titles": [],
+            "errors": [f"{node_name}: {str(e)}"],
         }
 
 
-async def draft_explanation(state: WorkflowState, context: WorkflowContext) -> dict:
+async def draft_explanation(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 4: Draft natural language explanation of findings.
     
     Uses the ExplanationDrafter tool to generate a human-readable report.
     """
     node_name = "draft_explanation"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
+        # Load the retrieved policies' content in a single query. This node
+        # runs after the parallel branches have joined, so the shared session
+        # is not in use elsewhere.
+        policies = await load_policy_excerpts(
+            context.session,
+            [UUID(policy_id) for policy_id in state["retrieved_policy_ids"]],
+            max_chars=500,
+        )
+        
         # Prepare tool input
         tool_input = {
             "customer_id": state["customer_id"],
             "anomalies": state.get("anomalies", []),
             "transaction_summary": state.get("transaction_summary", {}),
-            "policies": state.get("retrieved_policies", []),
+            "policies": policies,
             "use_mock": settings.use_mock_llm,
         }
         
@@ -239,22 +287,23 @@ async def draft_explanation(state: WorkflowState, context: WorkflowContext) -> d
         return {
             "explanation": "Error generating explanation",
             "confidence_score": 0.0,
-            "errors": state.get("errors", []) + [f"{node_name}: {str(e)}"],
+            "errors": [f"{node_name}: {str(e)}"],
         }
 
 
-async def evaluate_confidence(state: WorkflowState, context: WorkflowContext) -> dict:
+async def evaluate_confidence(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 5: Evaluate confidence and determine if escalation is needed.
     
     This is a decision node that routes to either escalate or finalize.
     """
     node_name = "evaluate_confidence"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
         confidence = state.get("confidence_score", 0.0)
-        threshold = settings.confidence_threshold
+        threshold = _CONFIDENCE_THRESHOLD
         
         # Determine if escalation is needed
         needs_escalation = confidence < threshold
@@ -280,17 +329,18 @@ async def evaluate_confidence(state: WorkflowState, context: WorkflowContext) ->
         return {
             "is_escalated": True,
             "escalation_reason": f"Error in confidence evaluation: {str(e)}",
-            "errors": state.get("errors", []) + [f"{node_name}: {str(e)}"],
+            "errors": [f"{node_name}: {str(e)}"],
         }
 
 
-async def escalate(state: WorkflowState, context: WorkflowContext) -> dict:
+async def escalate(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 6a: Escalate case for human review.
     
     Logs escalation and prepares case for analyst review.
     """
     node_name = "escalate"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
@@ -317,38 +367,41 @@ async def escalate(state: WorkflowState, context: WorkflowContext) -> dict:
     except Exception as e:
         logger.error(f"Error in {node_name}: {e}")
         await context.audit_logger.log_error(node_name, e, state)
-        return {"errors": state.get("errors", []) + [f"{node_name}: {str(e)}"]}
+        return {"errors": [f"{node_name}: {str(e)}"]}
 
 
-async def finalize(state: WorkflowState, context: WorkflowContext) -> dict:
+async def finalize(state: WorkflowState, config: RunnableConfig) -> dict:
     """
     Node 6b/7: Finalize workflow execution.
     
     Assembles final result with all findings.
     """
     node_name = "finalize"
+    context = get_context(config)
     await context.audit_logger.log_node_start(node_name, state)
     
     try:
+        # Every key is defined by the initial state, so read each one once
+        is_escalated = state["is_escalated"]
+        errors = state["errors"]
+        
         # Build final result
         final_result = {
-            "status": "escalated" if state.get("is_escalated") else "completed",
+            "status": "escalated" if is_escalated else "completed",
             "customer_id": state["customer_id"],
-            "anomalies_detected": state.get("anomaly_count", 0),
-            "confidence_score": state.get("confidence_score", 0.0),
-            "is_escalated": state.get("is_escalated", False),
-            "explanation": state.get("explanation", ""),
-            "matched_policies": [
-                p.get("title") for p in state.get("retrieved_policies", [])
-            ],
-            "recommended_actions": state.get("recommended_actions", []),
+            "anomalies_detected": state["anomaly_count"],
+            "confidence_score": state["confidence_score"],
+            "is_escalated": is_escalated,
+            "explanation": state["explanation"],
+            "matched_policies": state["retrieved_policy_titles"],
+            "recommended_actions": state["recommended_actions"],
         }
         
-        if state.get("is_escalated"):
-            final_result["escalation_reason"] = state.get("escalation_reason", "")
+        if is_escalated:
+            final_result["escalation_reason"] = state["escalation_reason"]
         
-        if state.get("errors"):
-            final_result["errors"] = state["errors"]
+        if errors:
+            final_result["errors"] = errors
         
         updates = {"final_result": final_result}
         
@@ -366,5 +419,5 @@ async def finalize(state: WorkflowState, context: WorkflowContext) -> dict:
                 "status": "failed",
                 "error": str(e),
             },
-            "errors": state.get("errors", []) + [f"{node_name}: {str(e)}"],
+            "errors": [f"{node_name}: {str(e)}"],
         }
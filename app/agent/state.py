@@ -3,7 +3,8 @@ LangGraph state definition for workflow execution.
 The state is shared across all nodes in the workflow.
 """
 
-from typing import TypedDict, List
+import operator
+from typing import Annotated, TypedDict, List
 
 
 class WorkflowState(TypedDict):
@@ -20,15 +21,15 @@ class WorkflowState(TypedDict):
     input_params: dict
     
     # Transaction data
-    transactions: list[dict]
     transaction_summary: dict
     
     # Anomaly detection
     anomalies: list[dict]
     anomaly_count: int
     
-    # RAG retrieval
-    retrieved_policies: list[dict]
+    # RAG retrieval (IDs and titles only; content is loaded where it is needed)
+    retrieved_policy_ids: list[str]
+    retrieved_policy_titles: list[str]
     
     # Explanation generation
     explanation: str
@@ -43,4 +44,5 @@ class WorkflowState(TypedDict):
     final_result: dict
     
     # Error tracking
-    errors: list[str]
+    # Nodes return only their new errors; the reducer appends them
+    errors: Annotated[list[str], operator.add]
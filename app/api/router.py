@@ -2,15 +2,18 @@
 FastAPI router with workflow execution endpoints.
 """
 
+import base64
 import logging
 from datetime import datetime
+from typing import AsyncContextManager, Callable, Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Integer, Row, bindparam, exists, func, insert, literal, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agent.graph import execute_workflow
 from app.api.schemas import (
     RunTaskRequest,
     RunTaskResponse,
@@ -22,15 +25,89 @@ from app.api.schemas import (
     CustomerSummary,
     ListCustomersResponse,
 )
-from app.config import settings
-from app.db import get_session
+from app.config import Settings, get_settings
+from app.db import get_session, get_session_factory
 from app.db.models import WorkflowRun, WorkflowStatus, AuditEvent, Customer
-from app.guardrails.enforcement import validate_workflow_input
+from app.worker import run_workflow_task
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Statements built once at import and executed with bound parameters, so each
+# request skips rebuilding the expression tree and hits the compiled cache.
+_SELECT_CUSTOMERS_PAGE = (
+    select(Customer)
+    .order_by(Customer.created_at)
+    .limit(bindparam("limit", type_=Integer))
+    .offset(bindparam("offset", type_=Integer))
+)
+_COUNT_CUSTOMERS = select(func.count()).select_from(Customer)
+
+_AUDIT_EVENT_COUNT = (
+    select(func.count())
+    .select_from(AuditEvent)
+    .where(AuditEvent.workflow_run_id == WorkflowRun.id)
+    .correlate(WorkflowRun)
+    .scalar_subquery()
+)
+_SELECT_RUN_WITH_AUDIT_COUNT = select(
+    WorkflowRun, _AUDIT_EVENT_COUNT.label("audit_event_count")
+).where(WorkflowRun.id == bindparam("run_id"))
+_RUN_EXISTS = select(exists().where(WorkflowRun.id == bindparam("run_id")))
+
+# The run's audit event count, or no row if the run does not exist
+_SELECT_RUN_AUDIT_COUNT = select(_AUDIT_EVENT_COUNT).where(
+    WorkflowRun.id == bindparam("run_id")
+)
+
+# Only the summary columns are selected so the covering run index can answer
+# audit pages alone; the _AFTER variant seeks past a (timestamp, id) cursor
+_SELECT_AUDIT_SUMMARY = (
+    select(
+        AuditEvent.id,
+        AuditEvent.node_name,
+        AuditEvent.tool_name,
+        AuditEvent.duration_ms,
+        AuditEvent.timestamp,
+    )
+    .where(AuditEvent.workflow_run_id == bindparam("run_id"))
+    .order_by(AuditEvent.timestamp, AuditEvent.id)
+)
+_SELECT_AUDIT_PAGE = _SELECT_AUDIT_SUMMARY.limit(bindparam("limit", type_=Integer))
+_SELECT_AUDIT_PAGE_AFTER = _SELECT_AUDIT_PAGE.where(
+    tuple_(AuditEvent.timestamp, AuditEvent.id)
+    > tuple_(
+        bindparam("after_timestamp", type_=AuditEvent.timestamp.type),
+        bindparam("after_id", type_=AuditEvent.id.type),
+    )
+)
+
+# Full trail for streaming, fetched from the server in batches
+_SELECT_AUDIT_TRAIL = _SELECT_AUDIT_SUMMARY.execution_options(yield_per=100)
+
+_SELECT_ONE = select(1)
+
+
+def _encode_audit_cursor(event: Row) -> str:
+    """Encode an audit event's (timestamp, id) sort key as an opaque cursor."""
+    raw = f"{event.timestamp.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_audit_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by _encode_audit_cursor.
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), UUID(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("/customers", response_model=ListCustomersResponse)
 async def list_customers(
@@ -45,14 +122,11 @@ async def list_customers(
     """
     try:
         result = await session.execute(
-            select(Customer)
-            .order_by(Customer.created_at)
-            .limit(limit)
-            .offset(offset)
+            _SELECT_CUSTOMERS_PAGE, {"limit": limit, "offset": offset}
         )
         customers = list(result.scalars().all())
 
-        count_result = await session.execute(select(func.count()).select_from(Customer))
+        count_result = await session.execute(_COUNT_CUSTOMERS)
         total = count_result.scalar_one()
 
         return ListCustomersResponse(
@@ -75,82 +149,65 @@ async def list_customers(
 @router.post("/tasks/run", response_model=RunTaskResponse, status_code=202)
 async def run_task(
     request: RunTaskRequest,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
     """
     Start a workflow execution for a customer.
     
     This endpoint:
-    1. Validates the input
-    2. Creates a WorkflowRun record
-    3. Executes the LangGraph workflow
-    4. Updates the WorkflowRun with results
-    5. Returns the task ID
+    1. Validates the input (schema-level, including the customer UUID)
+    2. Creates a PENDING WorkflowRun record
+    3. Schedules the LangGraph workflow as a background task
+    4. Returns the task ID immediately
     """
     try:
-        # Validate input
-        validate_workflow_input({"customer_id": request.customer_id})
+        # customer_id is already a validated UUID (malformed IDs get a 422)
+        customer_id = request.customer_id
+        workflow_run_id = uuid4()
+        input_params = {
+            "analysis_window_days": request.analysis_window_days,
+            "anomaly_threshold": request.anomaly_threshold,
+        }
         
-        # Check if customer exists
-        customer_id = UUID(request.customer_id)
-        customer_result = await session.execute(
-            select(Customer).where(Customer.id == customer_id)
+        # Create the workflow run only if the customer exists (one round trip).
+        # Built per request: parameters passed to an INSERT at execute time
+        # are taken as VALUES columns, so it cannot be a bound constant.
+        insert_stmt = (
+            insert(WorkflowRun)
+            .from_select(
+                ["id", "customer_id", "status", "input_params"],
+                select(
+                    literal(workflow_run_id, WorkflowRun.id.type),
+                    Customer.id,
+                    literal(WorkflowStatus.PENDING, WorkflowRun.status.type),
+                    literal(input_params, WorkflowRun.input_params.type),
+                ).where(Customer.id == customer_id),
+            )
+            .returning(WorkflowRun.created_at)
         )
-        customer = customer_result.scalars().first()
+        created_at = (await session.execute(insert_stmt)).scalar_one_or_none()
         
-        if not customer:
+        if created_at is None:
             raise HTTPException(status_code=404, detail="Customer not found")
         
-        # Create workflow run record
-        workflow_run = WorkflowRun(
-            id=uuid4(),
-            customer_id=customer_id,
-            status=WorkflowStatus.RUNNING,
-            input_params={
-                "analysis_window_days": request.analysis_window_days,
-                "anomaly_threshold": request.anomaly_threshold,
-            },
-        )
-        
-        session.add(workflow_run)
         await session.commit()
-        await session.refresh(workflow_run)
         
-        logger.info(f"Created workflow run {workflow_run.id} for customer {customer_id}")
+        logger.info(f"Created workflow run {workflow_run_id} for customer {customer_id}")
         
-        # Execute workflow (async in background for real app, but synchronous here for simplicity)
-        try:
-            result = await execute_workflow(
-                workflow_run_id=workflow_run.id,
-                customer_id=customer_id,
-                input_params=workflow_run.input_params,
-                session=session,
-            )
-            
-            # Update workflow run with result
-            workflow_run.result = result
-            workflow_run.status = (
-                WorkflowStatus.ESCALATED
-                if result.get("is_escalated")
-                else WorkflowStatus.COMPLETED
-            )
-            workflow_run.completed_at = datetime.now()
-            
-            await session.commit()
-            
-        except Exception as e:
-            logger.error(f"Workflow execution failed: {e}")
-            workflow_run.status = WorkflowStatus.FAILED
-            workflow_run.error_message = str(e)
-            workflow_run.completed_at = datetime.now()
-            await session.commit()
-            raise
+        # Execute after the response is sent; clients poll GET /tasks/{task_id}
+        background_tasks.add_task(
+            run_workflow_task,
+            workflow_run_id,
+            customer_id,
+            input_params,
+        )
         
         return RunTaskResponse(
-            task_id=str(workflow_run.id),
-            customer_id=str(customer_id),
-            status=workflow_run.status.value,
-            created_at=workflow_run.created_at,
+            task_id=workflow_run_id,
+            customer_id=customer_id,
+            status=WorkflowStatus.PENDING.value,
+            created_at=created_at,
         )
         
     except HTTPException:
@@ -172,20 +229,16 @@ async def get_task(
         # Parse task ID
         workflow_run_id = UUID(task_id)
         
-        # Query workflow run
+        # Query workflow run together with its audit event count
         result = await session.execute(
-            select(WorkflowRun).where(WorkflowRun.id == workflow_run_id)
+            _SELECT_RUN_WITH_AUDIT_COUNT, {"run_id": workflow_run_id}
         )
-        workflow_run = result.scalars().first()
+        row = result.first()
         
-        if not workflow_run:
+        if row is None:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        # Count audit events
-        audit_result = await session.execute(
-            select(AuditEvent).where(AuditEvent.workflow_run_id == workflow_run_id)
-        )
-        audit_events = list(audit_result.scalars().all())
+        workflow_run, audit_event_count = row
         
         # Calculate duration
         duration_ms = None
@@ -193,10 +246,10 @@ async def get_task(
             duration = workflow_run.completed_at - workflow_run.created_at
             duration_ms = int(duration.total_seconds() * 1000)
         
-        # Parse result
+        # Stored results were produced by the workflow itself; skip re-validation
         workflow_result = None
         if workflow_run.result:
-            workflow_result = WorkflowResult(**workflow_run.result)
+            workflow_result = WorkflowResult.model_construct(**workflow_run.result)
         
         return GetTaskResponse(
             task_id=str(workflow_run.id),
@@ -206,7 +259,7 @@ async def get_task(
             completed_at=workflow_run.completed_at,
             input_params=workflow_run.input_params,
             result=workflow_result,
-            audit_event_count=len(audit_events),
+            audit_event_count=audit_event_count,
             duration_ms=duration_ms,
         )
         
@@ -219,34 +272,52 @@ async def get_task(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/tasks/{task_id}/audit", response_model=GetAuditResponse)
+@router.get(
+    "/tasks/{task_id}/audit",
+    response_model=GetAuditResponse,
+    response_class=ORJSONResponse,
+)
 async def get_task_audit(
     task_id: str,
+    response: Response,
     session: AsyncSession = Depends(get_session),
+    limit: int = Query(default=50, ge=1, le=500, description="Max number of events to return"),
+    after: Optional[str] = Query(default=None, description="Cursor from a previous page's X-Next-Cursor header"),
 ):
     """
-    Get full audit trail for a workflow run.
+    Get the audit trail for a workflow run, one page at a time.
+    
+    Events are ordered by (timestamp, id). When more events remain, the
+    X-Next-Cursor response header carries the cursor for the next page;
+    the whole trail is available unpaged from /tasks/{task_id}/audit/stream.
+    ``total_events`` is always the run's full trail length.
     """
     try:
         # Parse task ID
         workflow_run_id = UUID(task_id)
         
-        # Query workflow run (to verify it exists)
-        workflow_result = await session.execute(
-            select(WorkflowRun).where(WorkflowRun.id == workflow_run_id)
+        # Verify the workflow run exists, counting its events on the way
+        total_events = await session.scalar(
+            _SELECT_RUN_AUDIT_COUNT, {"run_id": workflow_run_id}
         )
-        workflow_run = workflow_result.scalars().first()
         
-        if not workflow_run:
+        if total_events is None:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        # Query audit events
-        audit_result = await session.execute(
-            select(AuditEvent)
-            .where(AuditEvent.workflow_run_id == workflow_run_id)
-            .order_by(AuditEvent.timestamp)
-        )
-        audit_events = list(audit_result.scalars().all())
+        # Query one page of audit events (keyset pagination, one extra row
+        # to detect whether another page follows)
+        params = {"run_id": workflow_run_id, "limit": limit + 1}
+        stmt = _SELECT_AUDIT_PAGE
+        if after is not None:
+            params["after_timestamp"], params["after_id"] = _decode_audit_cursor(after)
+            stmt = _SELECT_AUDIT_PAGE_AFTER
+        
+        audit_result = await session.execute(stmt, params)
+        audit_events = list(audit_result.all())
+        
+        if len(audit_events) > limit:
+            audit_events = audit_events[:limit]
+            response.headers["X-Next-Cursor"] = _encode_audit_cursor(audit_events[-1])
         
         # Convert to summary format
         event_summaries = [
@@ -262,7 +333,7 @@ async def get_task_audit(
         
         return GetAuditResponse(
             task_id=task_id,
-            total_events=len(event_summaries),
+            total_events=total_events,
             events=event_summaries,
         )
         
@@ -275,14 +346,53 @@ async def get_task_audit(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/tasks/{task_id}/audit/stream")
+async def stream_task_audit(
+    task_id: str,
+    session: AsyncSession = Depends(get_session),
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]] = Depends(
+        get_session_factory
+    ),
+):
+    """
+    Stream the full audit trail for a workflow run as NDJSON.
+    
+    One AuditEventSummary object per line, ordered by (timestamp, id). Rows
+    are fetched in batches, so memory stays constant however long the trail.
+    """
+    try:
+        workflow_run_id = UUID(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid task ID format")
+    
+    workflow_exists = await session.scalar(_RUN_EXISTS, {"run_id": workflow_run_id})
+    if not workflow_exists:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    async def event_lines():
+        # The request session is closed before the body is sent, so the
+        # stream needs a session of its own
+        async with session_factory() as stream_session:
+            result = await stream_session.stream(
+                _SELECT_AUDIT_TRAIL, {"run_id": workflow_run_id}
+            )
+            async for event in result:
+                yield orjson.dumps(event._asdict()) + b"\n"
+    
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check(session: AsyncSession = Depends(get_session)):
+async def health_check(
+    session: AsyncSession = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+):
     """
     Health check endpoint.
     """
     try:
         # Test database connection
-        await session.execute(select(1))
+        await session.execute(_SELECT_ONE)
         database_connected = True
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
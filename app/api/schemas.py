@@ -12,7 +12,7 @@ from pydantic import BaseModel, Field
 class RunTaskRequest(BaseModel):
     """Request to run a workflow for a customer."""
 
-    customer_id: str = Field(
+    customer_id: UUID = Field(
         description="Customer UUID to analyze",
         examples=["a1b2c3d4-e5f6-7890-abcd-ef1234567890"],
     )
@@ -33,8 +33,8 @@ class RunTaskRequest(BaseModel):
 class RunTaskResponse(BaseModel):
     """Response after starting a workflow."""
 
-    task_id: str = Field(description="Workflow run ID")
-    customer_id: str = Field(description="Customer ID")
+    task_id: UUID = Field(description="Workflow run ID")
+    customer_id: UUID = Field(description="Customer ID")
     status: str = Field(description="Workflow status")
     created_at: datetime = Field(description="Workflow creation timestamp")
 
@@ -3,30 +3,53 @@ Append-only audit logger for workflow events.
 Every node execution and tool call is logged to the database.
 """
 
-import hashlib
-import json
+import re
 import time
+from collections import deque
+from datetime import datetime, timezone
 from typing import Any, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+import orjson
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import AuditEvent
 
+_MAX_STRING_CHARS = 1000
+_MAX_LIST_ITEMS = 100
+_REDACTED = "***REDACTED***"
+# Keys whose values are never logged (compared lowercased)
+_REDACT_KEYS = frozenset({"password", "api_key", "token", "secret"})
+# Serialized forms of the redacted keys, for the fast-path scan
+_REDACT_MARKERS = tuple(f'"{key}"'.encode() for key in _REDACT_KEYS)
+# Credential-shaped substrings redacted from string values: OpenAI-style keys,
+# GitHub tokens, AWS access key IDs, bearer tokens. One alternation compiled
+# once, so each value (or a whole serialized payload) is scanned in one pass.
+_SECRET_PATTERN_SOURCE = (
+    r"sk-[A-Za-z0-9_-]{20,}"
+    r"|gh[pousr]_[A-Za-z0-9]{36}"
+    r"|AKIA[0-9A-Z]{16}"
+    r"|(?i:bearer)\s+[A-Za-z0-9._~+/-]{20,}=*"
+)
+_SECRET_PATTERN = re.compile(_SECRET_PATTERN_SOURCE)
+_SECRET_PATTERN_BYTES = re.compile(_SECRET_PATTERN_SOURCE.encode())
+
 
 class AuditLogger:
     """
     Append-only audit logger that records workflow execution details.
     
-    All events are persisted to the audit_events table with:
+    Events are buffered in memory and written to the audit_events table in a
+    single batch by flush(), which the workflow driver calls once per run.
+    Each event carries:
     - Workflow run ID
     - Node name
     - Tool name (if applicable)
     - Input data (sanitized)
     - Output data (sanitized)
     - Duration in milliseconds
-    - Timestamp
+    - Timestamp (assigned when the event is logged, so ordering survives batching)
     """
 
     def __init__(self, session: AsyncSession, workflow_run_id: UUID):
@@ -40,6 +63,7 @@ class AuditLogger:
         self.session = session
         self.workflow_run_id = workflow_run_id
         self._start_times: dict[str, float] = {}
+        self._pending: list[dict] = []
 
     def start_timer(self, key: str) -> None:
         """
@@ -73,7 +97,12 @@ class AuditLogger:
         
         - Converts to JSON-serializable format
         - Truncates very large strings
+        - Limits lists to 100 items
         - Removes sensitive fields
+        - Redacts credential-shaped substrings in string values
+        
+        Small payloads with nothing to truncate or redact are normalized by an
+        orjson round trip; everything else goes through an iterative walk.
         
         Args:
             data: Data to sanitize
@@ -84,51 +113,122 @@ class AuditLogger:
         if data is None:
             return {}
 
-        if isinstance(data, dict):
-            sanitized = {}
-            for key, value in data.items():
-                # Skip sensitive fields
-                if key.lower() in {"password", "api_key", "token", "secret"}:
-                    sanitized[key] = "***REDACTED***"
-                    continue
+        if not isinstance(data, (dict, list)):
+            if isinstance(data, str):
+                return {"value": AuditLogger._redact_secrets(data)}
+            if isinstance(data, (int, float, bool)):
+                return {"value": data}
+            return {"value": str(data)}
 
-                # Truncate long strings
-                if isinstance(value, str) and len(value) > 1000:
-                    sanitized[key] = value[:1000] + "... (truncated)"
-                elif isinstance(value, (dict, list)):
-                    sanitized[key] = AuditLogger._sanitize_data(value)
-                else:
-                    sanitized[key] = value
-            return sanitized
+        # Fast path: a payload this small cannot hold a truncatable string,
+        # one without lists needs no item wrapping or capping, and the marker
+        # and pattern scans are conservative checks for anything to redact.
+        # The scans only see what a string value holds if it encodes as-is:
+        # escapes (e.g. a newline as \n) and non-ASCII whitespace would hide
+        # a match, so such payloads take the walk instead.
+        try:
+            encoded = orjson.dumps(data)
+        except TypeError:
+            encoded = None
+        if (
+            encoded is not None
+            and len(encoded) <= _MAX_STRING_CHARS
+            and encoded.isascii()
+            and b"\\" not in encoded
+            and b"[" not in encoded
+            and not any(marker in encoded.lower() for marker in _REDACT_MARKERS)
+            and _SECRET_PATTERN_BYTES.search(encoded) is None
+        ):
+            return orjson.loads(encoded)
 
-        if isinstance(data, list):
-            return [AuditLogger._sanitize_data(item) for item in data[:100]]  # Limit to 100 items
+        # Slow path: explicit-stack walk, filling pre-created containers
+        root: Any = {} if isinstance(data, dict) else []
+        stack = deque([(root, data)])
+        while stack:
+            target, source = stack.pop()
+            if isinstance(source, dict):
+                for key, value in source.items():
+                    # Skip sensitive fields
+                    if isinstance(key, str) and (
+                        key if key.islower() else key.lower()
+                    ) in _REDACT_KEYS:
+                        target[key] = _REDACTED
+                    else:
+                        target[key] = AuditLogger._sanitize_value(value, stack)
+            else:
+                for item in source[:_MAX_LIST_ITEMS]:
+                    target.append(AuditLogger._sanitize_list_item(item, stack))
 
-        if isinstance(data, (str, int, float, bool)):
-            return {"value": data}
+        return orjson.loads(
+            orjson.dumps(root, default=str, option=orjson.OPT_NON_STR_KEYS)
+        )
 
-        # For other types, attempt JSON serialization
-        try:
-            return {"value": str(data)}
-        except Exception:
-            return {"value": "<non-serializable>"}
+    @staticmethod
+    def _sanitize_value(value: Any, stack: deque) -> Any:
+        """
+        Sanitize one value for _sanitize_data's walk.
+        
+        Containers are replaced by empty copies and queued on the stack to be
+        filled; strings have secrets redacted and are truncated; anything else
+        passes through.
+        
+        Args:
+            value: Value to sanitize
+            stack: Pending (target, source) container pairs
+            
+        Returns:
+            Sanitized value (possibly a still-empty container)
+        """
+        if isinstance(value, str):
+            value = AuditLogger._redact_secrets(value)
+            if len(value) > _MAX_STRING_CHARS:
+                return value[:_MAX_STRING_CHARS] + "... (truncated)"
+            return value
+        if isinstance(value, dict):
+            container: Any = {}
+        elif isinstance(value, list):
+            container = []
+        else:
+            return value
+        stack.append((container, value))
+        return container
 
     @staticmethod
-    def _hash_input(data: dict) -> str:
+    def _sanitize_list_item(item: Any, stack: deque) -> Any:
         """
-        Create a hash of input data for deduplication checking.
+        Sanitize one list item for _sanitize_data's walk.
+        
+        Containers are handled as by _sanitize_value; scalars are wrapped as
+        {"value": ...} and None becomes {}, the shape list items have always
+        been stored in.
         
         Args:
-            data: Input data
+            item: List item to sanitize
+            stack: Pending (target, source) container pairs
             
         Returns:
-            SHA256 hash of the data
+            Sanitized item
         """
-        try:
-            data_str = json.dumps(data, sort_keys=True)
-            return hashlib.sha256(data_str.encode()).hexdigest()[:16]
-        except Exception:
-            return "unknown"
+        if item is None:
+            return {}
+        if isinstance(item, (str, int, float, bool)):
+            return {"value": AuditLogger._sanitize_value(item, stack)}
+        if isinstance(item, (dict, list)):
+            return AuditLogger._sanitize_value(item, stack)
+        return {"value": str(item)}
+
+    @staticmethod
+    def _redact_secrets(value: str) -> str:
+        """
+        Replace credential-shaped substrings with the redaction marker.
+        
+        Args:
+            value: String to scan
+            
+        Returns:
+            The string with any matches redacted
+        """
+        return _SECRET_PATTERN.sub(_REDACTED, value)
 
     async def log_node_start(
         self,
@@ -162,18 +262,18 @@ class AuditLogger:
         timer_key = f"node_{node_name}"
         duration_ms = self.stop_timer(timer_key)
 
-        audit_event = AuditEvent(
-            workflow_run_id=self.workflow_run_id,
-            node_name=node_name,
-            tool_name=None,
-            input_data=self._sanitize_data(input_data),
-            output_data=self._sanitize_data(output_data),
-            duration_ms=duration_ms,
+        self._pending.append(
+            {
+                "workflow_run_id": self.workflow_run_id,
+                "node_name": node_name,
+                "tool_name": None,
+                "input_data": self._sanitize_data(input_data),
+                "output_data": self._sanitize_data(output_data),
+                "duration_ms": duration_ms,
+                "timestamp": datetime.now(timezone.utc),
+            }
         )
 
-        self.session.add(audit_event)
-        await self.session.flush()
-
     async def log_tool_call(
         self,
         node_name: str,
@@ -192,18 +292,18 @@ class AuditLogger:
             output_data: Output from the tool
             duration_ms: Duration of tool execution in milliseconds
         """
-        audit_event = AuditEvent(
-            workflow_run_id=self.workflow_run_id,
-            node_name=node_name,
-            tool_name=tool_name,
-            input_data=self._sanitize_data(input_data),
-            output_data=self._sanitize_data(output_data),
-            duration_ms=duration_ms,
+        self._pending.append(
+            {
+                "workflow_run_id": self.workflow_run_id,
+                "node_name": node_name,
+                "tool_name": tool_name,
+                "input_data": self._sanitize_data(input_data),
+                "output_data": self._sanitize_data(output_data),
+                "duration_ms": duration_ms,
+                "timestamp": datetime.now(timezone.utc),
+            }
         )
 
-        self.session.add(audit_event)
-        await self.session.flush()
-
     async def log_error(
         self,
         node_name: str,
@@ -221,29 +321,46 @@ class AuditLogger:
         timer_key = f"node_{node_name}"
         duration_ms = self.stop_timer(timer_key) if timer_key in self._start_times else 0
 
-        audit_event = AuditEvent(
-            workflow_run_id=self.workflow_run_id,
-            node_name=node_name,
-            tool_name=None,
-            input_data=self._sanitize_data(input_data),
-            output_data={
-                "error": True,
-                "error_type": type(error).__name__,
-                "error_message": str(error),
-            },
-            duration_ms=duration_ms,
+        self._pending.append(
+            {
+                "workflow_run_id": self.workflow_run_id,
+                "node_name": node_name,
+                "tool_name": None,
+                "input_data": self._sanitize_data(input_data),
+                "output_data": {
+                    "error": True,
+                    "error_type": type(error).__name__,
+                    "error_message": str(error),
+                },
+                "duration_ms": duration_ms,
+                "timestamp": datetime.now(timezone.utc),
+            }
         )
 
-        self.session.add(audit_event)
-        await self.session.flush()
+    async def flush(self) -> None:
+        """
+        Write all buffered audit events to the database in one batch.
+        
+        The caller owns the transaction and is responsible for committing.
+        """
+        if not self._pending:
+            return
+        
+        # Core executemany insert; audit rows are append-only and never need
+        # ORM identity tracking
+        rows, self._pending = self._pending, []
+        await self.session.execute(insert(AuditEvent), rows)
 
     async def get_audit_trail(self) -> list[AuditEvent]:
         """
         Retrieve all audit events for this workflow run.
         
+        Flushes buffered events first so the trail includes them.
+        
         Returns:
             List of audit events ordered by timestamp
         """
+        await self.flush()
         result = await self.session.execute(
             select(AuditEvent)
             .where(AuditEvent.workflow_run_id == self.workflow_run_id)
@@ -258,5 +375,9 @@ class AuditLogger:
         Returns:
             Count of audit events
         """
-        events = await self.get_audit_trail()
-        return len(events)
+        await self.flush()
+        return await self.session.scalar(
+            select(func.count())
+            .select_from(AuditEvent)
+            .where(AuditEvent.workflow_run_id == self.workflow_run_id)
+        )
@@ -3,7 +3,8 @@ Application configuration using Pydantic Settings.
 Loads configuration from environment variables with validation.
 """
 
-from typing import Literal
+from functools import lru_cache
+from typing import Literal, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -27,6 +28,25 @@ class Settings(BaseSettings):
         default=False,
         description="Enable SQLAlchemy query logging",
     )
+    db_pool_size: int = Field(
+        default=20,
+        ge=1,
+        description="Persistent connections kept in the database pool",
+    )
+    db_max_overflow: int = Field(
+        default=10,
+        ge=0,
+        description="Extra connections allowed above the pool size under load",
+    )
+    db_pool_recycle_seconds: int = Field(
+        default=1800,
+        ge=-1,
+        description="Replace pooled connections older than this (-1 disables)",
+    )
+    db_pool_pre_ping: bool = Field(
+        default=False,
+        description="Ping connections on checkout (extra round trip; pool recycling usually suffices)",
+    )
 
     # LLM Configuration
     openai_api_key: str = Field(
@@ -55,6 +75,35 @@ class Settings(BaseSettings):
         default=384,
         description="Embedding vector dimension",
     )
+    embedding_concurrency: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="Embedding batches requested concurrently while indexing policies",
+    )
+    hnsw_ef_search: int = Field(
+        default=20,
+        ge=1,
+        le=1000,
+        description="pgvector HNSW candidate list size for policy retrieval (recall/latency trade-off)",
+    )
+    rag_binary_candidates: int = Field(
+        default=40,
+        ge=0,
+        le=1000,
+        description="Policies shortlisted by binary-quantized Hamming distance before exact cosine re-ranking (0 disables)",
+    )
+    policy_max_distance: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=2.0,
+        description="Cosine distance cutoff for retrieved policies (unset returns all top-k)",
+    )
+    txn_stats_max_age_seconds: int = Field(
+        default=300,
+        ge=0,
+        description="Max age of pre-computed transaction stats before falling back to a live scan (0 disables)",
+    )
 
     # Application Configuration
     app_name: str = Field(
@@ -134,5 +183,19 @@ class Settings(BaseSettings):
         return v
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Return the process-wide Settings, parsing the environment on first use.
+    
+    Usable as a FastAPI dependency, so tests can swap it via
+    app.dependency_overrides.
+    
+    Returns:
+        Cached Settings instance
+    """
+    return Settings()
+
+
+# Global settings instance (same object as get_settings())
+settings = get_settings()
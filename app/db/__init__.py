@@ -4,10 +4,11 @@ Provides SQLAlchemy models, async session management, and base classes.
 """
 
 from app.db.base import Base
-from app.db.session import get_session, engine, async_session_maker
+from app.db.session import get_session, get_session_factory, engine, async_session_maker
 from app.db.models import (
     Customer,
     Transaction,
+    CustomerTxnStats,
     PolicyDocument,
     WorkflowRun,
     AuditEvent,
@@ -17,10 +18,12 @@ from app.db.models import (
 __all__ = [
     "Base",
     "get_session",
+    "get_session_factory",
     "engine",
     "async_session_maker",
     "Customer",
     "Transaction",
+    "CustomerTxnStats",
     "PolicyDocument",
     "WorkflowRun",
     "AuditEvent",
@@ -0,0 +1,199 @@
+"""
+Database maintenance tasks.
+Keeps time-partitioned tables supplied with future partitions, builds the
+policy embedding indexes once policies are loaded, and refreshes the
+pre-computed customer transaction stats.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, cast, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from app.db.models import CustomerTxnStats, PolicyDocument, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Window served from customer_txn_stats (the analyzer's default look-back)
+TXN_STATS_WINDOW_DAYS = 30
+
+# Tables range-partitioned by month on their timestamp column (migration 005)
+PARTITIONED_TABLES = ("transactions",)
+
+# HNSW indexes over policy embeddings, built after loading; their
+# parameters are declared on the model
+POLICY_EMBEDDING_INDEXES = tuple(
+    index
+    for index in PolicyDocument.__table__.indexes
+    if index.name in (
+        "ix_policy_documents_embedding_hnsw",
+        "ix_policy_documents_embedding_bin_hnsw",
+    )
+)
+
+
+async def ensure_future_partitions(
+    session: AsyncSession,
+    months_ahead: int = 3,
+) -> None:
+    """
+    Create monthly partitions from the current month through ``months_ahead``.
+    
+    Idempotent; existing partitions are left untouched. Requires the
+    create_monthly_partitions() function installed by the migrations, so this
+    is a no-op on databases created without them (e.g. SQLite in tests).
+    
+    Args:
+        session: Database session
+        months_ahead: Number of future months to provision
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+    
+    for table in PARTITIONED_TABLES:
+        await session.execute(
+            text(
+                "SELECT create_monthly_partitions("
+                ":parent, CURRENT_DATE, "
+                "(CURRENT_DATE + make_interval(months => :months_ahead))::date)"
+            ),
+            {"parent": table, "months_ahead": months_ahead},
+        )
+    
+    await session.commit()
+    logger.info(f"Ensured partitions for {', '.join(PARTITIONED_TABLES)} ({months_ahead} months ahead)")
+
+
+async def ensure_policy_embedding_indexes(session: AsyncSession) -> None:
+    """
+    Build the policy embedding HNSW indexes that do not exist yet.
+    
+    Neither the migrations (revisions 002 and 013) nor create_all build them
+    on an empty table, so that loading the policies does not pay for
+    incremental HNSW inserts; call this after seeding and embedding them to
+    build each graph in one pass. Idempotent, and a no-op on non-PostgreSQL
+    databases.
+    
+    Args:
+        session: Database session
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+    
+    # HNSW builds are far faster when the graph fits in maintenance memory
+    await session.execute(text("SET LOCAL maintenance_work_mem = '2GB'"))
+    for index in POLICY_EMBEDDING_INDEXES:
+        await session.execute(CreateIndex(index, if_not_exists=True))
+    await session.commit()
+    logger.info(f"Ensured indexes {', '.join(index.name for index in POLICY_EMBEDDING_INDEXES)}")
+
+
+async def refresh_customer_txn_stats(
+    session: AsyncSession,
+    window_days: int = TXN_STATS_WINDOW_DAYS,
+) -> int:
+    """
+    Rebuild the customer_txn_stats rows for one rolling window.
+    
+    Aggregates per (customer, category) in SQL and folds the groups into one
+    row per customer, so readers get the full analysis from a single lookup.
+    
+    Args:
+        session: Database session
+        window_days: Look-back window to pre-compute
+        
+    Returns:
+        Number of customer rows written
+    """
+    window_end = datetime.now(timezone.utc)
+    window_start = window_end - timedelta(days=window_days)
+    in_window = (
+        Transaction.timestamp >= window_start,
+        Transaction.timestamp <= window_end,
+    )
+    
+    category_rows = await session.execute(
+        select(
+            Transaction.customer_id,
+            Transaction.category,
+            func.count().label("n"),
+            func.sum(Transaction.amount).label("total"),
+            func.min(Transaction.amount).label("min_amount"),
+            func.max(Transaction.amount).label("max_amount"),
+            func.sum(cast(Transaction.is_anomaly, Integer)).label("anomalies"),
+            func.min(Transaction.currency).label("currency"),
+        )
+        .where(*in_window)
+        .group_by(Transaction.customer_id, Transaction.category)
+    )
+    merchant_rows = await session.execute(
+        select(Transaction.customer_id, Transaction.merchant)
+        .where(*in_window)
+        .distinct()
+    )
+    
+    refreshed_at = datetime.now(timezone.utc)
+    stats: dict = {}
+    for row in category_rows:
+        entry = stats.setdefault(
+            row.customer_id,
+            {
+                "customer_id": row.customer_id,
+                "window_days": window_days,
+                "window_end": window_end,
+                "transaction_count": 0,
+                "total_amount": 0.0,
+                "min_amount": row.min_amount,
+                "max_amount": row.max_amount,
+                "anomaly_count": 0,
+                "currency": row.currency,
+                "category_breakdown": {},
+                "merchant_list": [],
+                "refreshed_at": refreshed_at,
+            },
+        )
+        entry["transaction_count"] += row.n
+        entry["total_amount"] += row.total
+        entry["min_amount"] = min(entry["min_amount"], row.min_amount)
+        entry["max_amount"] = max(entry["max_amount"], row.max_amount)
+        entry["anomaly_count"] += row.anomalies or 0
+        entry["category_breakdown"][row.category] = round(row.total, 2)
+    
+    for row in merchant_rows:
+        merchants = stats[row.customer_id]["merchant_list"]
+        # Same cap as the live analysis
+        if len(merchants) < 20:
+            merchants.append(row.merchant)
+    
+    await session.execute(
+        delete(CustomerTxnStats).where(CustomerTxnStats.window_days == window_days)
+    )
+    if stats:
+        await session.execute(insert(CustomerTxnStats), list(stats.values()))
+    await session.commit()
+    
+    logger.info(f"Refreshed {window_days}-day transaction stats for {len(stats)} customers")
+    return len(stats)
+
+
+async def run_txn_stats_refresher(
+    session_factory: async_sessionmaker,
+    interval_seconds: int,
+) -> None:
+    """
+    Refresh customer_txn_stats every ``interval_seconds`` until cancelled.
+    
+    Args:
+        session_factory: Factory for per-refresh sessions
+        interval_seconds: Delay between refreshes
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                await refresh_customer_txn_stats(session)
+        except Exception as e:
+            logger.warning(f"Transaction stats refresh failed: {e}")
+        await asyncio.sleep(interval_seconds)
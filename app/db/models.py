@@ -1,6 +1,6 @@
 """
 SQLAlchemy ORM models for all database tables.
-Includes: Customer, Transaction, PolicyDocument, WorkflowRun, AuditEvent
+Includes: Customer, Transaction, CustomerTxnStats, PolicyDocument, WorkflowRun, AuditEvent
 """
 
 import enum
@@ -8,24 +8,40 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 from sqlalchemy import (
     JSON,
     Boolean,
     DateTime,
-    Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     Text,
     func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 
+# Binary JSONB on PostgreSQL (no re-parse on read, GIN-indexable); plain JSON
+# elsewhere, e.g. SQLite in tests
+_JSONB = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _built_after_loading(ddl, target, bind, **kw) -> bool:
+    # ddl_if guard for indexes create_all must skip: HNSW graphs are built
+    # once over loaded rows by ensure_policy_embedding_indexes(), not on the
+    # empty table create_all starts from
+    return False
+
+
 class WorkflowStatus(str, enum.Enum):
     """Workflow execution status."""
 
@@ -36,6 +52,34 @@ class WorkflowStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+# Stable on-disk codes; append new statuses, never renumber
+_STATUS_CODES = {
+    WorkflowStatus.PENDING: 0,
+    WorkflowStatus.RUNNING: 1,
+    WorkflowStatus.COMPLETED: 2,
+    WorkflowStatus.ESCALATED: 3,
+    WorkflowStatus.FAILED: 4,
+}
+_STATUS_BY_CODE = {code: status for status, code in _STATUS_CODES.items()}
+
+
+class WorkflowStatusType(TypeDecorator):
+    """Stores WorkflowStatus as a SMALLINT code; Python code sees the enum."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return _STATUS_CODES[WorkflowStatus(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _STATUS_BY_CODE[value]
+
+
 class Customer(Base):
     """Synthetic customer data for demo purposes."""
 
@@ -51,12 +95,20 @@ class Customer(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
-    # Relationships
+    # Relationships; collections raise on lazy load so per-row access in a
+    # list query fails loudly instead of issuing N+1 SELECTs. Load them with
+    # an explicit selectinload() when needed; deletes rely on ON DELETE CASCADE.
     transactions: Mapped[list["Transaction"]] = relationship(
-        back_populates="customer", cascade="all, delete-orphan"
+        back_populates="customer",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
     workflow_runs: Mapped[list["WorkflowRun"]] = relationship(
-        back_populates="customer", cascade="all, delete-orphan"
+        back_populates="customer",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
 
     def __repr__(self) -> str:
@@ -67,6 +119,9 @@ class Transaction(Base):
     """Synthetic transaction data with optional anomaly labels."""
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_customer_ts", "customer_id", text("timestamp DESC")),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     customer_id: Mapped[UUID] = mapped_column(
@@ -78,7 +133,11 @@ class Transaction(Base):
     category: Mapped[str] = mapped_column(
         String(100), nullable=False
     )  # groceries, travel, etc.
-    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Part of the primary key: the table is range-partitioned on it
+    # (migration 005), and PostgreSQL requires the partition key in the PK
+    timestamp: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
     is_anomaly: Mapped[bool] = mapped_column(
         Boolean, nullable=False, default=False
     )  # Demo label
@@ -90,10 +149,54 @@ class Transaction(Base):
         return f"<Transaction(id={self.id}, amount={self.amount}, merchant={self.merchant})>"
 
 
+class CustomerTxnStats(Base):
+    """Pre-computed per-customer transaction aggregates over a rolling window."""
+
+    __tablename__ = "customer_txn_stats"
+
+    customer_id: Mapped[UUID] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True
+    )
+    window_days: Mapped[int] = mapped_column(Integer, primary_key=True)
+    window_end: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    transaction_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    min_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    max_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    anomaly_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    category_breakdown: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    merchant_list: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CustomerTxnStats(customer_id={self.customer_id}, window_days={self.window_days}, n={self.transaction_count})>"
+
+
 class PolicyDocument(Base):
     """Mock policy documents with vector embeddings for RAG."""
 
     __tablename__ = "policy_documents"
+    __table_args__ = (
+        # Neither the migrations nor create_all build this;
+        # ensure_policy_embedding_indexes() builds it from this definition
+        # once the policies are loaded
+        Index(
+            "ix_policy_documents_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "halfvec_ip_ops"},
+        ).ddl_if(callable_=_built_after_loading),
+        # Hamming-distance shortlist over sign-bit quantized embeddings; built
+        # after loading like the index above (migration 013 builds it only
+        # over existing rows)
+        Index(
+            "ix_policy_documents_embedding_bin_hnsw",
+            text("(binary_quantize(embedding)::bit(384)) bit_hamming_ops"),
+            postgresql_using="hnsw",
+        ).ddl_if(callable_=_built_after_loading),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -101,9 +204,9 @@ class PolicyDocument(Base):
     category: Mapped[str] = mapped_column(
         String(100), nullable=False
     )  # fraud, limits, escalation, etc.
-    embedding: Mapped[Optional[Vector]] = mapped_column(
-        Vector(384), nullable=True
-    )  # 384-dim for all-MiniLM-L6-v2
+    embedding: Mapped[Optional[HALFVEC]] = mapped_column(
+        HALFVEC(384), nullable=True
+    )  # 384-dim fp16 for all-MiniLM-L6-v2
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -116,13 +219,25 @@ class WorkflowRun(Base):
     """Tracks workflow execution runs and their results."""
 
     __tablename__ = "workflow_runs"
+    __table_args__ = (
+        Index("ix_workflow_runs_customer_status", "customer_id", "status"),
+        Index("ix_workflow_runs_status", "status"),
+        # Non-terminal runs only (pending, running, escalated); stays small as
+        # completed history grows
+        Index(
+            "ix_workflow_runs_active",
+            "customer_id",
+            "created_at",
+            postgresql_where=text("status IN (0, 1, 3)"),
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     customer_id: Mapped[UUID] = mapped_column(
         ForeignKey("customers.id", ondelete="CASCADE"), nullable=False
     )
     status: Mapped[WorkflowStatus] = mapped_column(
-        Enum(WorkflowStatus, native_enum=False, length=20),
+        WorkflowStatusType(),
         nullable=False,
         default=WorkflowStatus.PENDING,
     )
@@ -139,7 +254,10 @@ class WorkflowRun(Base):
     # Relationships
     customer: Mapped["Customer"] = relationship(back_populates="workflow_runs")
     audit_events: Mapped[list["AuditEvent"]] = relationship(
-        back_populates="workflow_run", cascade="all, delete-orphan"
+        back_populates="workflow_run",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
 
     def __repr__(self) -> str:
@@ -150,6 +268,29 @@ class AuditEvent(Base):
     """Append-only audit log of all workflow steps and tool calls."""
 
     __tablename__ = "audit_events"
+    __table_args__ = (
+        # Index-only scans for paging through a run's audit summary
+        Index(
+            "ix_audit_events_run_ts_id_covering",
+            "workflow_run_id",
+            "timestamp",
+            "id",
+            postgresql_include=["node_name", "tool_name", "duration_ms"],
+        ),
+        # Containment lookups (input_data @> '{...}') on the payloads
+        Index(
+            "ix_audit_events_input_data_gin",
+            "input_data",
+            postgresql_using="gin",
+            postgresql_ops={"input_data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_audit_events_output_data_gin",
+            "output_data",
+            postgresql_using="gin",
+            postgresql_ops={"output_data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     workflow_run_id: Mapped[UUID] = mapped_column(
@@ -157,8 +298,8 @@ class AuditEvent(Base):
     )
     node_name: Mapped[str] = mapped_column(String(100), nullable=False)
     tool_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
-    input_data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
-    output_data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    input_data: Mapped[dict] = mapped_column(_JSONB, nullable=False, default=dict)
+    output_data: Mapped[dict] = mapped_column(_JSONB, nullable=False, default=dict)
     duration_ms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -3,7 +3,7 @@ Async database session management.
 Provides SQLAlchemy async engine and session factory.
 """
 
-from typing import AsyncGenerator
+from typing import AsyncContextManager, AsyncGenerator, Callable
 
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -14,13 +14,22 @@ from sqlalchemy.ext.asyncio import (
 
 from app.config import settings
 
+# Keep prepared statements per connection for the repeated workflow queries
+# (e.g. the policy similarity search) so PostgreSQL skips parse/plan on reuse
+_connect_args: dict = {}
+if settings.database_url.startswith("postgresql+asyncpg"):
+    _connect_args["prepared_statement_cache_size"] = 500
+
 # Create async engine
 engine: AsyncEngine = create_async_engine(
     settings.database_url,
     echo=settings.database_echo,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    query_cache_size=1200,
+    connect_args=_connect_args,
 )
 
 # Create async session factory
@@ -51,3 +60,17 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+def get_session_factory() -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """
+    Dependency for routes that need a session beyond the request's lifetime.
+    
+    Sessions from get_session are closed before a streaming response body is
+    sent, so streaming routes open their own session from this factory while
+    the body is produced. Overriding it reaches those sessions in tests.
+    
+    Returns:
+        Callable returning an async context manager that yields a session
+    """
+    return async_session_maker
@@ -3,7 +3,7 @@ Synthetic policy document generator.
 Creates fake internal policy documents for RAG demonstration.
 """
 
-from uuid import uuid4
+from uuid import NAMESPACE_OID, uuid5
 
 from app.db.models import PolicyDocument
 
@@ -427,24 +427,43 @@ POLICY_DOCUMENTS = [
     },
 ]
 
+# Strip the indented triple-quoted content once at import rather than on
+# every generate_policy_documents() call
+for _policy_data in POLICY_DOCUMENTS:
+    _policy_data["content"] = _policy_data["content"].strip()
+
+# Column values per document, built once. IDs are derived from the title so
+# every seed produces the same primary keys.
+_POLICY_ROWS = [
+    {
+        "id": uuid5(NAMESPACE_OID, policy_data["title"]),
+        "title": policy_data["title"],
+        "content": policy_data["content"],
+        "category": policy_data["category"],
+        "embedding": None,  # Will be populated by RAG indexer
+    }
+    for policy_data in POLICY_DOCUMENTS
+]
+
+
+def policy_document_rows() -> list[dict]:
+    """
+    Column values for the synthetic policy documents, for Core bulk inserts.
+    
+    Returns:
+        One row dict per policy document (without embeddings yet)
+    """
+    return list(_POLICY_ROWS)
+
 
 def generate_policy_documents() -> list[PolicyDocument]:
     """
     Generate synthetic policy documents for RAG demonstration.
     
+    Instances are fresh on every call (they can be added to a session), but
+    their IDs are stable across calls and processes.
+    
     Returns:
         List of PolicyDocument model instances (without embeddings yet)
     """
-    policies = []
-    
-    for policy_data in POLICY_DOCUMENTS:
-        policy = PolicyDocument(
-            id=uuid4(),
-            title=policy_data["title"],
-            content=policy_data["content"].strip(),
-            category=policy_data["category"],
-            embedding=None,  # Will be populated by RAG indexer
-        )
-        policies.append(policy)
-    
-    return policies
+    return [PolicyDocument(**row) for row in _POLICY_ROWS]
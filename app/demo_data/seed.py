@@ -4,18 +4,89 @@ Coordinates generation and insertion of all synthetic data.
 """
 
 import logging
-from sqlalchemy import select
+from sqlalchemy import Insert, exists, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.db.models import Customer, Transaction, PolicyDocument
 from app.demo_data.customers import generate_customers
-from app.demo_data.transactions import generate_transactions
-from app.demo_data.policies import generate_policy_documents
+from app.demo_data.transactions import generate_transaction_columns
+from app.demo_data.policies import policy_document_rows
+from app.rag.retriever import invalidate_policy_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _column_rows(instances: list) -> list[dict]:
+    """
+    Extract the attributes set on transient ORM instances as plain row dicts.
+    
+    The generators pre-assign primary keys, so the rows can be bulk-inserted
+    with Core and still reference each other without a flush.
+    
+    Args:
+        instances: Unsaved model instances
+        
+    Returns:
+        One dict per instance, keyed by column attribute
+    """
+    return [
+        {key: value for key, value in vars(obj).items() if not key.startswith("_sa_")}
+        for obj in instances
+    ]
+
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _insert_ignoring_conflicts(session: AsyncSession, model: type) -> Insert:
+    """
+    Build an INSERT that skips rows whose key already exists.
+    
+    Args:
+        session: Database session (selects the dialect)
+        model: Model class to insert into
+        
+    Returns:
+        INSERT ... ON CONFLICT DO NOTHING where supported, else a plain INSERT
+    """
+    dialect_insert = _CONFLICT_INSERTS.get(session.bind.dialect.name)
+    if dialect_insert is None:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+async def _insert_transactions(session: AsyncSession, columns: dict[str, list]) -> None:
+    """
+    Bulk-load transaction columns, using binary COPY when running on asyncpg.
+    
+    Rows are only stitched together here, in whatever shape the driver wants.
+    COPY goes through the session's own connection, so it commits atomically
+    with the rest of the seed. Other drivers fall back to a Core executemany.
+    
+    Args:
+        session: Database session
+        columns: Transaction column name to values, with pre-assigned ids
+    """
+    names = list(columns)
+    records = list(zip(*columns.values()))
+    if session.bind.dialect.driver != "asyncpg":
+        await session.execute(
+            insert(Transaction), [dict(zip(names, record)) for record in records]
+        )
+        return
+    
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        Transaction.__tablename__,
+        records=records,
+        columns=names,
+    )
+
+
 async def seed_database(session: AsyncSession) -> dict[str, int]:
     """
     Seed the database with synthetic data.
@@ -25,7 +96,7 @@ async def seed_database(session: AsyncSession) -> dict[str, int]:
     2. Generates synthetic customers
     3. Generates synthetic transactions
     4. Generates synthetic policy documents
-    5. Inserts all data into the database
+    5. Bulk-inserts all data with Core executemany INSERTs in one transaction
     
     Args:
         session: Database session
@@ -34,8 +105,8 @@ async def seed_database(session: AsyncSession) -> dict[str, int]:
         Dictionary with counts of created records
     """
     # Check if database already has data
-    existing_customers = await session.execute(select(Customer))
-    if existing_customers.scalars().first() is not None:
+    has_customers = await session.scalar(select(exists().select_from(Customer)))
+    if has_customers:
         logger.info("Database already contains data, skipping seeding")
         return {"customers": 0, "transactions": 0, "policies": 0}
     
@@ -44,36 +115,40 @@ async def seed_database(session: AsyncSession) -> dict[str, int]:
     # Generate customers
     logger.info(f"Generating {settings.seed_customers_count} customers...")
     customers = generate_customers(count=settings.seed_customers_count)
-    session.add_all(customers)
-    await session.flush()  # Flush to get customer IDs
+    if customers:
+        await session.execute(insert(Customer), _column_rows(customers))
     logger.info(f"Created {len(customers)} customers")
     
     # Generate transactions
     logger.info(f"Generating {settings.seed_transactions_count} transactions...")
-    transactions = generate_transactions(
-        customers=customers,
+    transactions = generate_transaction_columns(
+        customer_ids=[customer.id for customer in customers],
         total_count=settings.seed_transactions_count,
         anomaly_rate=0.05,
     )
-    session.add_all(transactions)
-    await session.flush()
-    logger.info(f"Created {len(transactions)} transactions ({sum(1 for t in transactions if t.is_anomaly)} anomalies)")
+    transaction_count = len(transactions["id"])
+    if transaction_count:
+        await _insert_transactions(session, transactions)
+    logger.info(f"Created {transaction_count} transactions ({sum(transactions['is_anomaly'])} anomalies)")
     
     # Generate policy documents
     logger.info(f"Generating policy documents...")
-    policies = generate_policy_documents()
-    session.add_all(policies)
-    await session.flush()
+    policies = policy_document_rows()
+    if policies:
+        # Policy IDs are stable, so documents left over from an earlier seed
+        # are skipped instead of failing the whole transaction
+        await session.execute(_insert_ignoring_conflicts(session, PolicyDocument), policies)
     logger.info(f"Created {len(policies)} policy documents")
     
     # Commit all changes
     await session.commit()
+    invalidate_policy_cache()
     
     logger.info("Database seeding completed successfully")
     
     return {
         "customers": len(customers),
-        "transactions": len(transactions),
+        "transactions": transaction_count,
         "policies": len(policies),
     }
 
@@ -88,12 +163,15 @@ async def check_seed_status(session: AsyncSession) -> dict[str, int]:
     Returns:
         Dictionary with current counts of records
     """
-    customer_count = (await session.execute(select(Customer))).scalars().all()
-    transaction_count = (await session.execute(select(Transaction))).scalars().all()
-    policy_count = (await session.execute(select(PolicyDocument))).scalars().all()
+    # All three counts in one round trip
+    counts = (
+        await session.execute(
+            select(
+                select(func.count()).select_from(Customer).scalar_subquery().label("customers"),
+                select(func.count()).select_from(Transaction).scalar_subquery().label("transactions"),
+                select(func.count()).select_from(PolicyDocument).scalar_subquery().label("policies"),
+            )
+        )
+    ).one()
     
-    return {
-        "customers": len(customer_count),
-        "transactions": len(transaction_count),
-        "policies": len(policy_count),
-    }
+    return dict(counts._mapping)
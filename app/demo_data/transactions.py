@@ -3,16 +3,17 @@ Synthetic transaction data generator with injected anomalies.
 Creates realistic transaction patterns with ~5% anomalies.
 """
 
-import random
-from datetime import datetime, timedelta
-from uuid import uuid4
+from datetime import datetime
+from uuid import UUID
 
-from faker import Faker
+import numpy as np
 
 from app.db.models import Customer, Transaction
+from app.demo_data.ids import random_uuids
 
-fake = Faker()
-Faker.seed(42)  # Consistent seed for reproducibility
+_rng = np.random.default_rng()
+
+ANOMALY_TYPES = ["large_amount", "odd_hour", "foreign", "high_frequency"]
 
 
 # Transaction categories with typical amount ranges
@@ -44,6 +45,124 @@ MERCHANTS = {
 }
 
 
+# Flat lookup tables so categories, amounts and merchants can be drawn as
+# whole NumPy arrays
+_CATEGORIES = list(TRANSACTION_CATEGORIES)
+_CATEGORY_MIN = np.array([TRANSACTION_CATEGORIES[c][0] for c in _CATEGORIES])
+_CATEGORY_MAX = np.array([TRANSACTION_CATEGORIES[c][1] for c in _CATEGORIES])
+_MERCHANT_NAMES = np.array([m for c in _CATEGORIES for m in MERCHANTS[c]])
+_MERCHANT_COUNTS = np.array([len(MERCHANTS[c]) for c in _CATEGORIES])
+_MERCHANT_OFFSETS = np.concatenate(([0], np.cumsum(_MERCHANT_COUNTS)[:-1]))
+FOREIGN_COUNTRIES = ["UK", "FR", "DE", "JP", "AU"]
+
+# Transaction kinds: 0 is normal, 1.. index ANOMALY_TYPES. Each kind scales
+# the category's (min, max) amount range.
+_KIND_ODD_HOUR = 1 + ANOMALY_TYPES.index("odd_hour")
+_KIND_FOREIGN = 1 + ANOMALY_TYPES.index("foreign")
+_AMOUNT_SCALES = {
+    "normal": (1.0, 1.0),
+    "large_amount": (10.0, 15.0),  # 10x typical amount
+    "odd_hour": (1.0, 1.0),  # Typical amount at 2-5 AM
+    "foreign": (2.0, 3.0),
+    "high_frequency": (1.0, 0.5),  # One of several small transactions
+}
+_MIN_SCALE = np.array([_AMOUNT_SCALES[k][0] for k in ["normal", *ANOMALY_TYPES]])
+_MAX_SCALE = np.array([_AMOUNT_SCALES[k][1] for k in ["normal", *ANOMALY_TYPES]])
+
+
+def _random_timestamps(now: datetime, hours: np.ndarray) -> np.ndarray:
+    """
+    Draw timestamps within the last 90 days, vectorized.
+    
+    Each timestamp is ``now`` minus a random 0-90 days, the given number of
+    hours, and a random 0-59 minutes, computed as one datetime64 array.
+    
+    Args:
+        now: Reference time
+        hours: Hour offset for each timestamp
+        
+    Returns:
+        datetime64[us] array, one entry per entry in ``hours``
+    """
+    size = len(hours)
+    offsets = (
+        _rng.integers(0, 91, size=size).astype("timedelta64[D]")
+        + hours.astype("timedelta64[h]")
+        + _rng.integers(0, 60, size=size).astype("timedelta64[m]")
+    )
+    return np.datetime64(now, "us") - offsets
+
+
+def generate_transaction_columns(
+    customer_ids: list[UUID],
+    total_count: int = 500,
+    anomaly_rate: float = 0.05,
+) -> dict[str, list]:
+    """
+    Generate synthetic transactions column by column.
+    
+    Every column is drawn as one NumPy array (no per-row Python RNG calls)
+    and converted to a list of Python values at the end. Rows are sorted by
+    timestamp.
+    
+    Args:
+        customer_ids: IDs of the customers to attach transactions to
+        total_count: Total number of transactions to generate
+        anomaly_rate: Fraction of transactions that should be anomalies (default 5%)
+        
+    Returns:
+        Mapping of Transaction column name to a list of ``total_count`` values
+    """
+    num_anomalies = int(total_count * anomaly_rate)
+    num_normal = total_count - num_anomalies
+    
+    kinds = np.concatenate((
+        np.zeros(num_normal, dtype=np.int64),
+        _rng.integers(1, len(ANOMALY_TYPES) + 1, size=num_anomalies),
+    ))
+    categories = _rng.integers(0, len(_CATEGORIES), size=total_count)
+    
+    amounts = _rng.uniform(
+        _CATEGORY_MIN[categories] * _MIN_SCALE[kinds],
+        _CATEGORY_MAX[categories] * _MAX_SCALE[kinds],
+    ).round(2)
+    
+    merchants = _MERCHANT_NAMES[
+        _MERCHANT_OFFSETS[categories] + _rng.integers(0, _MERCHANT_COUNTS[categories])
+    ]
+    # Foreign merchants are prefixed with a country code
+    countries = np.array(FOREIGN_COUNTRIES)[
+        _rng.integers(0, len(FOREIGN_COUNTRIES), size=total_count)
+    ]
+    merchants = np.where(
+        kinds == _KIND_FOREIGN, np.char.add(np.char.add(countries, "-"), merchants), merchants
+    )
+    
+    # Odd-hour anomalies happen at 2-5 AM, the rest during normal hours (6 AM - 11 PM)
+    timestamps = _random_timestamps(
+        datetime.now(),
+        np.where(
+            kinds == _KIND_ODD_HOUR,
+            _rng.integers(2, 6, size=total_count),
+            _rng.integers(6, 24, size=total_count),
+        ),
+    )
+    
+    customer_index = _rng.integers(0, len(customer_ids), size=total_count)
+    order = np.argsort(timestamps, kind="stable")
+    
+    return {
+        "id": random_uuids(total_count),
+        "customer_id": [customer_ids[i] for i in customer_index[order].tolist()],
+        "amount": amounts[order].tolist(),
+        "currency": ["USD"] * total_count,
+        "merchant": merchants[order].tolist(),
+        "category": [_CATEGORIES[i] for i in categories[order].tolist()],
+        "timestamp": timestamps[order].tolist(),
+        "is_anomaly": (kinds[order] > 0).tolist(),  # Demo label
+    }
+
+
 def generate_transactions(
     customers: list[Customer],
     total_count: int = 500,
@@ -64,91 +183,12 @@ def generate_transactions(
         anomaly_rate: Fraction of transactions that should be anomalies (default 5%)
         
     Returns:
-        List of Transaction model instances
+        List of Transaction model instances, sorted by timestamp
     """
-    transactions = []
-    num_anomalies = int(total_count * anomaly_rate)
-    
-    # Generate normal transactions
-    for i in range(total_count - num_anomalies):
-        customer = random.choice(customers)
-        category = random.choice(list(TRANSACTION_CATEGORIES.keys()))
-        min_amount, max_amount = TRANSACTION_CATEGORIES[category]
-        
-        amount = round(random.uniform(min_amount, max_amount), 2)
-        merchant = random.choice(MERCHANTS[category])
-        
-        # Random timestamp within last 90 days, during normal hours (6 AM - 11 PM)
-        days_ago = random.randint(0, 90)
-        hour = random.randint(6, 23)
-        minute = random.randint(0, 59)
-        
-        timestamp = datetime.now() - timedelta(days=days_ago, hours=hour, minutes=minute)
-        
-        transaction = Transaction(
-            id=uuid4(),
-            customer_id=customer.id,
-            amount=amount,
-            currency="USD",
-            merchant=merchant,
-            category=category,
-            timestamp=timestamp,
-            is_anomaly=False,
-        )
-        
-        transactions.append(transaction)
-    
-    # Generate anomalous transactions
-    for i in range(num_anomalies):
-        customer = random.choice(customers)
-        anomaly_type = random.choice(["large_amount", "odd_hour", "foreign", "high_frequency"])
-        
-        category = random.choice(list(TRANSACTION_CATEGORIES.keys()))
-        min_amount, max_amount = TRANSACTION_CATEGORIES[category]
-        
-        if anomaly_type == "large_amount":
-            # 10x typical amount
-            amount = round(random.uniform(min_amount * 10, max_amount * 15), 2)
-            merchant = random.choice(MERCHANTS[category])
-            hour = random.randint(6, 23)
-            
-        elif anomaly_type == "odd_hour":
-            # Transaction at 2-5 AM
-            amount = round(random.uniform(min_amount, max_amount), 2)
-            merchant = random.choice(MERCHANTS[category])
-            hour = random.randint(2, 5)
-            
-        elif anomaly_type == "foreign":
-            # Foreign merchant (prefixed with country code)
-            amount = round(random.uniform(min_amount * 2, max_amount * 3), 2)
-            country = random.choice(["UK", "FR", "DE", "JP", "AU"])
-            merchant = f"{country}-{random.choice(MERCHANTS[category])}"
-            hour = random.randint(6, 23)
-            
-        else:  # high_frequency
-            # Multiple transactions in short time (this is just one of them)
-            amount = round(random.uniform(min_amount, max_amount * 0.5), 2)
-            merchant = random.choice(MERCHANTS[category])
-            hour = random.randint(6, 23)
-        
-        days_ago = random.randint(0, 90)
-        minute = random.randint(0, 59)
-        timestamp = datetime.now() - timedelta(days=days_ago, hours=hour, minutes=minute)
-        
-        transaction = Transaction(
-            id=uuid4(),
-            customer_id=customer.id,
-            amount=amount,
-            currency="USD",
-            merchant=merchant,
-            category=category,
-            timestamp=timestamp,
-            is_anomaly=True,  # Mark as anomaly for demo purposes
-        )
-        
-        transactions.append(transaction)
-    
-    # Sort by timestamp
-    transactions.sort(key=lambda t: t.timestamp)
-    
-    return transactions
+    columns = generate_transaction_columns(
+        [customer.id for customer in customers], total_count, anomaly_rate
+    )
+    names = list(columns)
+    return [
+        Transaction(**dict(zip(names, values))) for values in zip(*columns.values())
+    ]
@@ -5,7 +5,8 @@ Provides tool allowlisting, schema validation, and content filtering.
 
 import logging
 import re
-from typing import Any, Set
+import uuid
+from typing import Any, ClassVar, FrozenSet
 
 from pydantic import BaseModel, ValidationError
 
@@ -35,12 +36,15 @@ class GuardrailEnforcer:
     """
 
     # Approved tools that can be invoked
-    ALLOWED_TOOLS: Set[str] = {
+    ALLOWED_TOOLS: ClassVar[FrozenSet[str]] = frozenset({
         "transaction_analyzer",
         "anomaly_detector",
         "explanation_drafter",
         "policy_retriever",
-    }
+    })
+
+    # Listed in violation messages; built once rather than sorted per failure
+    _ALLOWED_TOOLS_STR: ClassVar[str] = ", ".join(sorted(ALLOWED_TOOLS))
 
     # Prohibited patterns in explanations (real institution names, PII patterns, etc.)
     PROHIBITED_PATTERNS = [
@@ -63,6 +67,12 @@ class GuardrailEnforcer:
         r"\b(PCI DSS|SOC 2|GDPR compliant|certified by)\b",
     ]
 
+    # All patterns as one alternation, so the text is scanned once per check
+    _PROHIBITED_RE = re.compile(
+        "|".join(f"(?:{pattern})" for pattern in PROHIBITED_PATTERNS),
+        re.IGNORECASE,
+    )
+
     def __init__(self):
         self.tool_call_count = 0
         self.max_tool_calls = settings.max_tool_calls_per_workflow
@@ -80,7 +90,7 @@ class GuardrailEnforcer:
         if tool_name not in self.ALLOWED_TOOLS:
             raise GuardrailViolation(
                 f"Tool '{tool_name}' is not on the allowlist. "
-                f"Allowed tools: {', '.join(sorted(self.ALLOWED_TOOLS))}",
+                f"Allowed tools: {self._ALLOWED_TOOLS_STR}",
                 violation_type="tool_not_allowed"
             )
 
@@ -146,15 +156,14 @@ class GuardrailEnforcer:
         Raises:
             GuardrailViolation: If prohibited patterns are found
         """
-        for pattern in self.PROHIBITED_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                raise GuardrailViolation(
-                    f"Content contains prohibited pattern: {match.group()}. "
-                    f"This is a demo project and must not reference real institutions, "
-                    f"PII, financial advice, or compliance claims.",
-                    violation_type="prohibited_content"
-                )
+        match = self._PROHIBITED_RE.search(text)
+        if match:
+            raise GuardrailViolation(
+                f"Content contains prohibited pattern: {match.group()}. "
+                f"This is a demo project and must not reference real institutions, "
+                f"PII, financial advice, or compliance claims.",
+                violation_type="prohibited_content"
+            )
 
     def increment_tool_call(self) -> None:
         """
@@ -191,6 +200,36 @@ class GuardrailEnforcer:
         self.tool_call_count = 0
 
 
+# Real institution names and their generic replacements, keyed by lowercase
+# name since matching is case-insensitive
+_INSTITUTION_REPLACEMENTS = {
+    "wells fargo": "Example Bank",
+    "bank of america": "Demo Financial",
+    "chase": "Sample Trust",
+    "citibank": "Mock Banking Corp",
+    "capital one": "Test Financial Services",
+}
+
+# Institution names, SSNs and credit card numbers in one pass; only the
+# institution names are matched case-insensitively
+_SANITIZE_RE = re.compile(
+    r"(?P<institution>(?i:\b(?:"
+    + "|".join(re.escape(name) for name in _INSTITUTION_REPLACEMENTS)
+    + r")\b))"
+    r"|(?P<ssn>\b\d{3}-\d{2}-\d{4}\b)"
+    r"|(?P<card>\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b)"
+)
+
+
+def _sanitize_match(match: re.Match) -> str:
+    """Replacement text for a _SANITIZE_RE match."""
+    if match.lastgroup == "institution":
+        return _INSTITUTION_REPLACEMENTS[match.group().lower()]
+    if match.lastgroup == "ssn":
+        return "XXX-XX-XXXX"
+    return "XXXX-XXXX-XXXX-XXXX"
+
+
 def sanitize_for_demo(text: str) -> str:
     """
     Sanitize text to ensure it's appropriate for a public demo.
@@ -203,35 +242,29 @@ def sanitize_for_demo(text: str) -> str:
     Returns:
         Sanitized text
     """
-    # Replace real institution names with generic ones
-    institution_replacements = {
-        "Wells Fargo": "Example Bank",
-        "Bank of America": "Demo Financial",
-        "Chase": "Sample Trust",
-        "Citibank": "Mock Banking Corp",
-        "Capital One": "Test Financial Services",
-    }
-    
-    result = text
-    for real_name, demo_name in institution_replacements.items():
-        result = re.sub(
-            rf"\b{re.escape(real_name)}\b",
-            demo_name,
-            result,
-            flags=re.IGNORECASE
-        )
-    
-    # Redact SSN patterns
-    result = re.sub(r"\b\d{3}-\d{2}-\d{4}\b", "XXX-XX-XXXX", result)
-    
-    # Redact credit card patterns
-    result = re.sub(
-        r"\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b",
-        "XXXX-XXXX-XXXX-XXXX",
-        result
-    )
-    
-    return result
+    # Replace real institution names with generic ones and redact SSN and
+    # credit card patterns
+    return _SANITIZE_RE.sub(_sanitize_match, text)
+
+
+# Canonical hyphenated UUID string; the common form, checked without
+# constructing a UUID
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z", re.IGNORECASE
+)
+
+
+def _is_uuid_string(value: Any) -> bool:
+    """Check a value is a string uuid.UUID() accepts (hex, braces, urn:uuid:)."""
+    if not isinstance(value, str):
+        return False
+    if _UUID_RE.match(value):
+        return True
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
 
 
 def validate_workflow_input(input_params: dict) -> None:
@@ -256,10 +289,7 @@ def validate_workflow_input(input_params: dict) -> None:
     # Validate customer_id format (should be UUID string)
     customer_id = input_params.get("customer_id")
     if customer_id:
-        import uuid
-        try:
-            uuid.UUID(customer_id)
-        except (ValueError, AttributeError):
+        if not _is_uuid_string(customer_id):
             raise GuardrailViolation(
                 f"Invalid customer_id format: {customer_id}. Must be a valid UUID.",
                 violation_type="invalid_workflow_input"
@@ -2,16 +2,24 @@
 FastAPI application factory and startup/shutdown handlers.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
+from app.agent.nodes import warm_policy_cache
 from app.api.router import router
 from app.config import settings
 from app.db import engine, async_session_maker
 from app.db.base import Base
+from app.db.maintenance import (
+    ensure_future_partitions,
+    ensure_policy_embedding_indexes,
+    run_txn_stats_refresher,
+)
 from app.demo_data import seed_database
 from app.rag.indexer import index_policy_documents
 
@@ -33,8 +41,13 @@ async def lifespan(app: FastAPI):
     - Create database tables (via Alembic in production)
     - Seed synthetic data if configured
     - Index policy documents for RAG
+    - Build the policy embedding HNSW indexes over the loaded policies
+    - Create upcoming table partitions
+    - Warm the policy retrieval cache
+    - Start the periodic transaction stats refresh
     
     Shutdown:
+    - Stop the transaction stats refresh
     - Close database connections
     """
     logger.info("Starting up Enterprise Agentic Workflow Engine...")
@@ -58,12 +71,47 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Seeding failed: {e}")
     
+    # Build the ANN indexes only now, over the loaded and embedded policies
+    try:
+        async with async_session_maker() as session:
+            await ensure_policy_embedding_indexes(session)
+    except Exception as e:
+        logger.warning(f"Policy embedding index build skipped: {e}")
+    
+    # Provision upcoming monthly partitions (only on migrated PostgreSQL databases)
+    try:
+        async with async_session_maker() as session:
+            await ensure_future_partitions(session)
+    except Exception as e:
+        logger.warning(f"Partition maintenance skipped: {e}")
+    
+    # Warm the policy retrieval cache for the common (no anomaly) path
+    try:
+        async with async_session_maker() as session:
+            await warm_policy_cache(session)
+        logger.info("Policy retrieval cache warmed")
+    except Exception as e:
+        logger.warning(f"Policy cache warm-up failed: {e}")
+    
+    # Keep customer_txn_stats fresh; the first refresh runs immediately
+    stats_refresher = None
+    if settings.txn_stats_max_age_seconds > 0:
+        stats_refresher = asyncio.create_task(
+            run_txn_stats_refresher(
+                async_session_maker,
+                # Refresh well inside the max age so readers rarely see a stale row
+                max(settings.txn_stats_max_age_seconds // 2, 1),
+            )
+        )
+    
     logger.info("Application startup complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Enterprise Agentic Workflow Engine...")
+    if stats_refresher is not None:
+        stats_refresher.cancel()
     await engine.dispose()
     logger.info("Database connections closed")
 
@@ -118,6 +166,7 @@ def create_app() -> FastAPI:
         """,
         lifespan=lifespan,
         debug=settings.debug,
+        default_response_class=ORJSONResponse,
     )
     
     # Add CORS middleware
@@ -3,6 +3,10 @@ Policy document loader module.
 Provides utilities for loading mock policy documents.
 """
 
-from app.policies.loader import load_policy_by_id, load_policies_by_category
+from app.policies.loader import (
+    load_policy_by_id,
+    load_policy_excerpts,
+    load_policies_by_category,
+)
 
-__all__ = ["load_policy_by_id", "load_policies_by_category"]
+__all__ = ["load_policy_by_id", "load_policy_excerpts", "load_policies_by_category"]
@@ -7,7 +7,7 @@ import logging
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import PolicyDocument
@@ -29,11 +29,52 @@ async def load_policy_by_id(
     Returns:
         PolicyDocument instance or None if not found
     """
+    # Primary-key lookup; served from the identity map if already loaded
+    return await session.get(PolicyDocument, policy_id)
+
+
+async def load_policy_excerpts(
+    session: AsyncSession,
+    policy_ids: List[UUID],
+    max_chars: int = 500,
+) -> List[dict]:
+    """
+    Load several policy documents in one query, preserving the given order.
+    
+    Content is truncated by the database, so at most ``max_chars`` characters
+    per document are transferred. The embedding column is not loaded.
+    
+    Args:
+        session: Database session
+        policy_ids: Policy document UUIDs
+        max_chars: Maximum number of content characters per document
+        
+    Returns:
+        List of dicts with id, title, content and category (missing IDs are skipped)
+    """
+    if not policy_ids:
+        return []
+    
     result = await session.execute(
-        select(PolicyDocument).where(PolicyDocument.id == policy_id)
+        select(
+            PolicyDocument.id,
+            PolicyDocument.title,
+            func.substr(PolicyDocument.content, 1, max_chars).label("content"),
+            PolicyDocument.category,
+        ).where(PolicyDocument.id.in_(policy_ids))
     )
+    rows_by_id = {row.id: row for row in result}
     
-    return result.scalars().first()
+    return [
+        {
+            "id": str(row.id),
+            "title": row.title,
+            "content": row.content,
+            "category": row.category,
+        }
+        for row in (rows_by_id.get(pid) for pid in policy_ids)
+        if row is not None
+    ]
 
 
 async def load_policies_by_category(
@@ -52,13 +93,13 @@ async def load_policies_by_category(
     Returns:
         List of PolicyDocument instances
     """
-    result = await session.execute(
+    result = await session.scalars(
         select(PolicyDocument)
         .where(PolicyDocument.category == category)
         .limit(limit)
     )
     
-    return list(result.scalars().all())
+    return result.all()
 
 
 async def load_all_policies(
@@ -75,11 +116,11 @@ async def load_all_policies(
     Returns:
         List of PolicyDocument instances
     """
-    result = await session.execute(
+    result = await session.scalars(
         select(PolicyDocument).limit(limit)
     )
     
-    return list(result.scalars().all())
+    return result.all()
 
 
 async def get_policy_categories(session: AsyncSession) -> List[str]:
@@ -92,8 +133,8 @@ async def get_policy_categories(session: AsyncSession) -> List[str]:
     Returns:
         List of category names
     """
-    result = await session.execute(
+    result = await session.scalars(
         select(PolicyDocument.category).distinct()
     )
     
-    return [row[0] for row in result.fetchall()]
+    return result.all()
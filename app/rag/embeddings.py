@@ -3,28 +3,42 @@ Embedding providers for converting text to vectors.
 Supports: OpenAI, Sentence Transformers, and Mock mode.
 """
 
+import asyncio
 import hashlib
 import logging
-import random
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import List
 
+import numpy as np
+
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# OpenAI embedding models accept at most this many input tokens per text
+OPENAI_MAX_INPUT_TOKENS = 8191
+
+# OpenAI recommends replacing newlines with spaces; one C-level pass
+_NEWLINES_TO_SPACES = str.maketrans("\n", " ")
+
 
 class EmbeddingProvider(ABC):
-    """Abstract base class for embedding providers."""
+    """
+    Abstract base class for embedding providers.
+    
+    Vectors must be unit length: the retriever ranks by inner product, which
+    equals cosine similarity only for normalized vectors.
+    """
 
     @abstractmethod
-    async def embed_text(self, text: str) -> List[float]:
-        """Generate embedding vector for text."""
+    async def embed_text(self, text: str) -> np.ndarray:
+        """Generate embedding vector for text, as a (dimension,) float32 array."""
         pass
 
     @abstractmethod
-    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embedding vectors for multiple texts."""
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Generate embedding vectors for multiple texts, as an (N, dimension) float32 array."""
         pass
 
     @property
@@ -44,28 +58,48 @@ class MockEmbeddingProvider(EmbeddingProvider):
         self._dimension = dimension
         logger.info(f"Initialized MockEmbeddingProvider (dim={dimension})")
 
-    def _text_to_seed(self, text: str) -> int:
+    @staticmethod
+    def _text_to_seed(text: str) -> int:
         """Convert text to deterministic seed for reproducibility."""
-        return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-
-    async def embed_text(self, text: str) -> List[float]:
-        """Generate deterministic mock embedding."""
-        seed = self._text_to_seed(text)
-        rng = random.Random(seed)
-        
-        # Generate random vector with unit length
-        vector = [rng.gauss(0, 1) for _ in range(self._dimension)]
-        
-        # Normalize to unit length
-        magnitude = sum(x * x for x in vector) ** 0.5
-        if magnitude > 0:
-            vector = [x / magnitude for x in vector]
+        # 64-bit seed straight from the digest bytes, no hex round trip; not a
+        # security use, so FIPS-restricted builds still allow MD5
+        digest = hashlib.md5(text.encode(), usedforsecurity=False).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    @staticmethod
+    def _embed_matrix(texts: List[str], dimension: int) -> np.ndarray:
+        """Draw one Gaussian row per text (seeded by its hash) and normalize rows to unit length."""
+        matrix = np.stack([
+            np.random.default_rng(MockEmbeddingProvider._text_to_seed(text)).standard_normal(dimension)
+            for text in texts
+        ])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _embed_one(text: str, dimension: int) -> np.ndarray:
+        """
+        Single-text embedding, cached per (text, dimension).
         
+        The cache lives on the class because the provider factory creates a
+        new instance per call. Cached arrays are read-only since they are
+        shared between callers.
+        """
+        vector = MockEmbeddingProvider._embed_matrix([text], dimension)[0]
+        vector.setflags(write=False)
         return vector
 
-    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    async def embed_text(self, text: str) -> np.ndarray:
+        """Generate deterministic mock embedding (cached for repeat queries)."""
+        return self._embed_one(text, self._dimension)
+
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
         """Generate mock embeddings for batch."""
-        return [await self.embed_text(text) for text in texts]
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        return self._embed_matrix(texts, self._dimension)
 
     @property
     def dimension(self) -> int:
@@ -88,19 +122,22 @@ class SentenceTransformerProvider(EmbeddingProvider):
             logger.error("sentence-transformers not installed, falling back to mock")
             raise ImportError("sentence-transformers package required")
 
-    async def embed_text(self, text: str) -> List[float]:
+    async def embed_text(self, text: str) -> np.ndarray:
         """Generate embedding using Sentence Transformers."""
         # Truncate to reasonable length
         text = text[:5000]
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        # encode() is CPU-bound; run it off the event loop
+        return await asyncio.to_thread(
+            self.model.encode, text, convert_to_numpy=True, normalize_embeddings=True
+        )
 
-    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for batch."""
         # Truncate all texts
         texts = [t[:5000] for t in texts]
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        return await asyncio.to_thread(
+            self.model.encode, texts, convert_to_numpy=True, normalize_embeddings=True
+        )
 
     @property
     def dimension(self) -> int:
@@ -113,40 +150,58 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
     Requires OPENAI_API_KEY environment variable.
     """
 
-    def __init__(self, model: str = "text-embedding-3-small"):
+    def __init__(self, model: str = "text-embedding-3-small", dimensions: int = 384):
         try:
             from openai import AsyncOpenAI
             self.client = AsyncOpenAI(api_key=settings.openai_api_key)
             self.model = model
-            # text-embedding-3-small has 1536 dimensions by default
-            # text-embedding-ada-002 has 1536 dimensions
-            self._dimension = 1536 if "ada" in model or "3-small" in model else 1536
+            # text-embedding-3 models return 1536 dimensions by default but can
+            # shorten them server-side; request the width the vector column uses
+            self._dimension = dimensions
             logger.info(f"Initialized OpenAI embeddings: {model} (dim={self._dimension})")
         except ImportError:
             logger.error("openai package not installed, falling back to mock")
             raise ImportError("openai package required")
-
-    async def embed_text(self, text: str) -> List[float]:
-        """Generate embedding using OpenAI API."""
-        text = text.replace("\n", " ")[:8000]  # OpenAI limit
         
+        # Truncate by tokens when the model's encoding is available; the
+        # encoding files may need a download, so fall back to characters
+        try:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(model)
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable for {model} ({e}), truncating by characters")
+            self._encoding = None
+
+    def _prepare_text(self, text: str) -> str:
+        """Replace newlines and truncate to the model's input limit."""
+        text = text.translate(_NEWLINES_TO_SPACES)
+        if self._encoding is None:
+            return text[:8000]
+        tokens = self._encoding.encode(text)
+        if len(tokens) <= OPENAI_MAX_INPUT_TOKENS:
+            return text
+        return self._encoding.decode(tokens[:OPENAI_MAX_INPUT_TOKENS])
+
+    async def embed_text(self, text: str) -> np.ndarray:
+        """Generate embedding using OpenAI API."""
         response = await self.client.embeddings.create(
-            input=[text],
-            model=self.model
+            input=[self._prepare_text(text)],
+            model=self.model,
+            dimensions=self._dimension,
         )
         
-        return response.data[0].embedding
+        # text-embedding-3 vectors are unit length, shortened ones included
+        return np.asarray(response.data[0].embedding, dtype=np.float32)
 
-    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for batch."""
-        texts = [t.replace("\n", " ")[:8000] for t in texts]
-        
         response = await self.client.embeddings.create(
-            input=texts,
-            model=self.model
+            input=[self._prepare_text(t) for t in texts],
+            model=self.model,
+            dimensions=self._dimension,
         )
         
-        return [item.embedding for item in response.data]
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
 
     @property
     def dimension(self) -> int:
@@ -178,7 +233,10 @@ def get_embedding_provider() -> EmbeddingProvider:
             return MockEmbeddingProvider(dimension=settings.embedding_dimension)
         
         try:
-            return OpenAIEmbeddingProvider(model="text-embedding-3-small")
+            return OpenAIEmbeddingProvider(
+                model="text-embedding-3-small",
+                dimensions=settings.embedding_dimension,
+            )
         except ImportError:
             logger.warning("OpenAI package not available, using mock")
             return MockEmbeddingProvider(dimension=settings.embedding_dimension)
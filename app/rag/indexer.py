@@ -3,27 +3,92 @@ Policy document indexing for RAG.
 Generates and stores embeddings for policy documents.
 """
 
+import asyncio
 import logging
-from typing import List
+from typing import List, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db.models import PolicyDocument
-from app.rag.embeddings import get_embedding_provider
+from app.rag.embeddings import EmbeddingProvider, get_embedding_provider
+from app.rag.retriever import invalidate_policy_cache
 
 logger = logging.getLogger(__name__)
 
 
+async def _store_embedded_batches(
+    session: AsyncSession,
+    embedding_provider: EmbeddingProvider,
+    batches: List[Sequence[Row]],
+    first_batch_number: int,
+) -> int:
+    """
+    Embed several batches concurrently, then store each one.
+    
+    Embedding requests overlap (network round trips for remote providers,
+    worker threads for local models); the UPDATEs run one after another
+    since a session is not safe for concurrent use. A failed batch is logged
+    and skipped.
+    
+    Args:
+        session: Database session
+        embedding_provider: Provider used to embed the texts
+        batches: Batches of (id, title, content) rows
+        first_batch_number: Number of the first batch, for logging
+        
+    Returns:
+        Number of documents stored
+    """
+    results = await asyncio.gather(
+        *(
+            embedding_provider.embed_batch(
+                [f"{policy.title}\n\n{policy.content}" for policy in batch]
+            )
+            for batch in batches
+        ),
+        return_exceptions=True,
+    )
+    
+    stored = 0
+    for batch_number, (batch, embeddings) in enumerate(
+        zip(batches, results), start=first_batch_number
+    ):
+        try:
+            if isinstance(embeddings, Exception):
+                raise embeddings
+            
+            # One executemany UPDATE ... WHERE id = :id per batch; pgvector
+            # binds the float32 array rows directly
+            await session.execute(
+                update(PolicyDocument),
+                [
+                    {"id": policy.id, "embedding": embedding}
+                    for policy, embedding in zip(batch, embeddings)
+                ],
+            )
+            stored += len(batch)
+            
+            logger.info(f"Indexed batch {batch_number}: {len(batch)} documents")
+            
+        except Exception as e:
+            logger.error(f"Error indexing batch {batch_number}: {e}")
+            # Continue with next batch
+            continue
+    
+    return stored
+
+
 async def index_policy_documents(
     session: AsyncSession,
-    batch_size: int = 10,
+    batch_size: int = 128,
 ) -> int:
     """
     Generate and store embeddings for all policy documents without embeddings.
     
     This function:
-    1. Finds all PolicyDocuments with null embeddings
+    1. Streams PolicyDocuments with null embeddings in batches
     2. Generates embeddings using the configured provider
     3. Updates the documents with their embeddings
     4. Commits the changes
@@ -35,53 +100,44 @@ async def index_policy_documents(
     Returns:
         Number of documents indexed
     """
-    # Find documents without embeddings
-    result = await session.execute(
-        select(PolicyDocument).where(PolicyDocument.embedding.is_(None))
-    )
-    policies = list(result.scalars().all())
-    
-    if not policies:
-        logger.info("All policy documents already have embeddings")
-        return 0
-    
-    logger.info(f"Indexing {len(policies)} policy documents...")
-    
     # Get embedding provider
     embedding_provider = get_embedding_provider()
     
-    # Process in batches
+    # Stream documents without embeddings one batch at a time, so memory stays
+    # flat and the first batch is embedded before the rest are read; only the
+    # columns the embedding text is built from are loaded
+    result = await session.stream(
+        select(PolicyDocument.id, PolicyDocument.title, PolicyDocument.content)
+        .where(PolicyDocument.embedding.is_(None))
+        .execution_options(yield_per=batch_size)
+    )
+    
+    # Process in batches, embedding up to embedding_concurrency at a time
     indexed_count = 0
-    for i in range(0, len(policies), batch_size):
-        batch = policies[i:i + batch_size]
-        
-        # Generate embeddings for batch
-        texts = [
-            f"{policy.title}\n\n{policy.content}"
-            for policy in batch
-        ]
+    batch_number = 0
+    pending: List[Sequence[Row]] = []
+    async for batch in result.partitions(batch_size):
+        batch_number += 1
+        pending.append(batch)
         
-        try:
-            embeddings = await embedding_provider.embed_batch(texts)
-            
-            # Update policy documents with embeddings
-            for policy, embedding in zip(batch, embeddings):
-                # pgvector expects the embedding as a list
-                policy.embedding = embedding
-            
-            # Flush to database
-            await session.flush()
-            indexed_count += len(batch)
-            
-            logger.info(f"Indexed batch {i//batch_size + 1}: {len(batch)} documents")
-            
-        except Exception as e:
-            logger.error(f"Error indexing batch {i//batch_size + 1}: {e}")
-            # Continue with next batch
-            continue
+        if len(pending) == settings.embedding_concurrency:
+            indexed_count += await _store_embedded_batches(
+                session, embedding_provider, pending, batch_number - len(pending) + 1
+            )
+            pending = []
+    
+    if pending:
+        indexed_count += await _store_embedded_batches(
+            session, embedding_provider, pending, batch_number - len(pending) + 1
+        )
+    
+    if batch_number == 0:
+        logger.info("All policy documents already have embeddings")
+        return 0
     
     # Commit all changes
     await session.commit()
+    invalidate_policy_cache()
     
     logger.info(f"Successfully indexed {indexed_count} policy documents")
     
@@ -90,7 +146,7 @@ async def index_policy_documents(
 
 async def reindex_all_policies(
     session: AsyncSession,
-    batch_size: int = 10,
+    batch_size: int = 128,
 ) -> int:
     """
     Regenerate embeddings for ALL policy documents (even those with existing embeddings).
@@ -104,21 +160,14 @@ async def reindex_all_policies(
     Returns:
         Number of documents reindexed
     """
-    # Get all policy documents
-    result = await session.execute(select(PolicyDocument))
-    policies = list(result.scalars().all())
+    # Clear existing embeddings with one UPDATE; no rows are loaded
+    cleared = await session.execute(update(PolicyDocument).values(embedding=None))
     
-    if not policies:
+    if cleared.rowcount == 0:
         logger.info("No policy documents to reindex")
         return 0
     
-    logger.info(f"Reindexing {len(policies)} policy documents...")
-    
-    # Clear existing embeddings
-    for policy in policies:
-        policy.embedding = None
-    
-    await session.flush()
+    logger.info(f"Reindexing {cleared.rowcount} policy documents...")
     
     # Use the regular indexing function
     return await index_policy_documents(session, batch_size)
@@ -134,15 +183,13 @@ async def get_indexing_status(session: AsyncSession) -> dict:
     Returns:
         Dictionary with indexing statistics
     """
-    # Total policies
-    total_result = await session.execute(select(PolicyDocument))
-    total = len(list(total_result.scalars().all()))
-    
-    # Policies with embeddings
-    indexed_result = await session.execute(
-        select(PolicyDocument).where(PolicyDocument.embedding.is_not(None))
+    # Total policies and policies with embeddings (count(column) skips NULLs),
+    # aggregated in one query
+    result = await session.execute(
+        select(func.count(), func.count(PolicyDocument.embedding))
+        .select_from(PolicyDocument)
     )
-    indexed = len(list(indexed_result.scalars().all()))
+    total, indexed = result.one()
     
     # Policies without embeddings
     unindexed = total - indexed
@@ -3,72 +3,427 @@ Vector similarity search using pgvector.
 Retrieves relevant policy documents based on semantic similarity.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+from uuid import UUID
 
-from sqlalchemy import select, text
+from pgvector.sqlalchemy import BIT, HALFVEC
+from sqlalchemy import (
+    Float,
+    Integer,
+    bindparam,
+    cast,
+    column,
+    func,
+    select,
+    text,
+    true,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db.models import PolicyDocument
 from app.rag.embeddings import get_embedding_provider
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of distinct queries kept in the retrieval cache
+_CACHE_MAX_SIZE = 256
+
+# Maximum number of query embeddings kept in the embedding cache
+_EMBEDDING_CACHE_MAX_SIZE = 1024
+
+# Seconds a cached list of policy categories is served without a query
+_CATEGORIES_TTL_SECONDS = 60.0
+
+# Number of content characters returned with each retrieved policy
+POLICY_EXCERPT_CHARS = 500
+
+
+class PolicySnapshot(NamedTuple):
+    """Immutable, session-independent copy of a retrieved policy document."""
+
+    id: UUID
+    title: str
+    content: str  # First POLICY_EXCERPT_CHARS characters
+    category: str
+
+
+# Retrieval results keyed by (normalized query, top_k, category_filter).
+# Entries are snapshots rather than ORM instances so they outlive the session
+# that loaded them.
+_retrieval_cache: OrderedDict[tuple, List[PolicySnapshot]] = OrderedDict()
+
+# Incremented whenever policy documents are written; a retrieval that started
+# before an invalidation does not populate the cache with stale results.
+_cache_version = 0
+
+# Query embeddings keyed by (provider, model, dimension, normalized query).
+# They depend only on the text and the embedding configuration, so unlike
+# retrieval results they survive policy writes, and are shared across top_k
+# and category variants of the same query.
+_embedding_cache: OrderedDict[tuple, Any] = OrderedDict()
+
+# (monotonic time loaded, categories) from the last get_all_policy_categories
+_categories_cache: Optional[tuple[float, List[str]]] = None
+
+
+# Similarity query built once at import, so SQLAlchemy's compiled cache and the
+# driver's prepared-statement cache see the same statement on every call.
+# Embeddings are unit length, so ranking by the negative inner product (<#>)
+# orders exactly like cosine distance without computing norms per row.
+# Ordering by the bare operator lets the HNSW index (halfvec_ip_ops) drive the
+# scan; the reported distance is the equivalent cosine distance, 1 + (a <#> b),
+# evaluated only for the rows returned.
+_QUERY_VECTOR = bindparam("query_vector", type_=HALFVEC(384))
+_NEG_INNER_PRODUCT = PolicyDocument.embedding.op("<#>", return_type=Float)(_QUERY_VECTOR)
+_DISTANCE = 1 + _NEG_INNER_PRODUCT
+_SIMILARITY_STMT = (
+    select(
+        PolicyDocument.id,
+        PolicyDocument.title,
+        # Truncate in the database so only a bounded excerpt crosses the wire
+        func.substr(PolicyDocument.content, 1, POLICY_EXCERPT_CHARS).label("content"),
+        PolicyDocument.category,
+        _DISTANCE.label("distance"),
+    )
+    .order_by(_NEG_INNER_PRODUCT)
+    .limit(bindparam("top_k", type_=Integer))
+)
+
+# First stage of two-stage retrieval: shortlist candidates by Hamming distance
+# between sign-bit quantized vectors (48 bytes per row, served by the
+# expression HNSW index built after loading), computing the exact cosine
+# distance only for the shortlisted rows. The expression must match the
+# index definition for the planner to use it.
+_EMBEDDING_BITS = cast(func.binary_quantize(PolicyDocument.embedding), BIT(384))
+_HAMMING = _EMBEDDING_BITS.op("<~>", return_type=Float)(
+    func.binary_quantize(_QUERY_VECTOR)
+)
+_BINARY_CANDIDATES_STMT = (
+    select(
+        PolicyDocument.id,
+        PolicyDocument.title,
+        func.substr(PolicyDocument.content, 1, POLICY_EXCERPT_CHARS).label("content"),
+        PolicyDocument.category,
+        _DISTANCE.label("distance"),
+    )
+    .order_by(_HAMMING)
+    .limit(bindparam("candidates", type_=Integer))
+)
+
+
+def invalidate_policy_cache() -> None:
+    """
+    Drop all cached retrieval results and the cached policy categories.
+    
+    Must be called by any code path that inserts or re-embeds policy documents.
+    """
+    global _cache_version, _categories_cache
+    _cache_version += 1
+    _retrieval_cache.clear()
+    _categories_cache = None
+
+
+def _embedding_cache_key(query: str) -> tuple:
+    return (
+        settings.embedding_provider,
+        settings.embedding_model,
+        settings.embedding_dimension,
+        query,
+    )
+
+
+async def _embed_query(query: str) -> Any:
+    """
+    Embed a normalized query, reusing a cached vector when available.
+    
+    Args:
+        query: Normalized query text
+        
+    Returns:
+        Query embedding vector
+    """
+    cache_key = _embedding_cache_key(query)
+    
+    cached = _embedding_cache.get(cache_key)
+    if cached is not None:
+        _embedding_cache.move_to_end(cache_key)
+        return cached
+    
+    embedding = await get_embedding_provider().embed_text(query)
+    
+    _embedding_cache[cache_key] = embedding
+    if len(_embedding_cache) > _EMBEDDING_CACHE_MAX_SIZE:
+        _embedding_cache.popitem(last=False)
+    
+    return embedding
+
+
+async def _embed_queries(queries: List[str]) -> List[Any]:
+    """
+    Embed several normalized queries, batching the cache misses into one call.
+    
+    Args:
+        queries: Distinct normalized query texts
+        
+    Returns:
+        Query embedding vectors, in the same order as queries
+    """
+    embeddings: Dict[str, Any] = {}
+    misses = []
+    for query in queries:
+        cache_key = _embedding_cache_key(query)
+        cached = _embedding_cache.get(cache_key)
+        if cached is not None:
+            _embedding_cache.move_to_end(cache_key)
+            embeddings[query] = cached
+        else:
+            misses.append(query)
+    
+    if misses:
+        computed = await get_embedding_provider().embed_batch(misses)
+        for query, embedding in zip(misses, computed):
+            embeddings[query] = embedding
+            _embedding_cache[_embedding_cache_key(query)] = embedding
+        while len(_embedding_cache) > _EMBEDDING_CACHE_MAX_SIZE:
+            _embedding_cache.popitem(last=False)
+    
+    return [embeddings[query] for query in queries]
+
+
+def _batch_cache_key(query: str, top_k: int, category_filter: Optional[str]) -> tuple:
+    # The "batch" marker keeps these apart from retrieve_relevant_policies'
+    # (query, top_k, category, max_distance) keys, which rank differently
+    return (query, top_k, category_filter, "batch")
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different query strings share a cache entry."""
+    return " ".join(query.split())
+
 
 async def retrieve_relevant_policies(
     session: AsyncSession,
     query: str,
     top_k: int = 3,
     category_filter: Optional[str] = None,
-) -> List[PolicyDocument]:
+    max_distance: Optional[float] = None,
+) -> List[PolicySnapshot]:
     """
     Retrieve relevant policy documents using vector similarity search.
     
     Uses cosine similarity with pgvector to find the most relevant documents
-    based on the query text.
+    based on the query text. Results are cached per normalized query, so the
+    embedding and the index probe run once per distinct query until the cache
+    is invalidated by a policy write.
     
     Args:
         session: Database session
         query: Query text to search for
         top_k: Number of top results to return (default: 3)
         category_filter: Optional category to filter results
+        max_distance: Optional cosine distance cutoff applied to the top_k rows
         
     Returns:
-        List of PolicyDocument instances, ordered by relevance
+        List of PolicySnapshot tuples, ordered by relevance
     """
-    # Generate embedding for query
-    embedding_provider = get_embedding_provider()
-    query_embedding = await embedding_provider.embed_text(query)
+    query = _normalize_query(query)
+    cache_key = (query, top_k, category_filter, max_distance)
+    
+    cached = _retrieval_cache.get(cache_key)
+    if cached is not None:
+        _retrieval_cache.move_to_end(cache_key)
+        return list(cached)
+    
+    version = _cache_version
+    
+    is_postgresql = session.bind.dialect.name == "postgresql"
+    candidates = settings.rag_binary_candidates if is_postgresql else 0
+    params = {"top_k": top_k}
     
-    # Build query with vector similarity
-    # Using cosine distance (1 - cosine_similarity) with <=> operator
-    stmt = select(PolicyDocument)
+    stmt = _BINARY_CANDIDATES_STMT if candidates else _SIMILARITY_STMT
     
     if category_filter:
         stmt = stmt.where(PolicyDocument.category == category_filter)
     
-    # Order by cosine distance (lower is more similar)
-    stmt = stmt.order_by(
-        text(f"embedding <=> CAST(:query_vector AS vector)")
-    ).limit(top_k)
+    if candidates:
+        # Re-rank the Hamming shortlist by exact cosine distance
+        params["candidates"] = max(candidates, top_k)
+        shortlist = stmt.subquery()
+        stmt = (
+            select(shortlist)
+            .order_by(shortlist.c.distance)
+            .limit(bindparam("top_k", type_=Integer))
+        )
     
-    # Execute query with embedding as parameter
-    # Convert list to string format expected by pgvector: '[1,2,3]'
-    vector_str = f"[{','.join(map(str, query_embedding))}]"
+    if max_distance is not None:
+        # Filter outside the LIMIT so the cutoff reuses the computed distance
+        # and does not prevent the index-ordered scan
+        ranked = stmt.subquery()
+        stmt = (
+            select(ranked)
+            .where(ranked.c.distance < max_distance)
+            .order_by(ranked.c.distance)
+        )
     
-    result = await session.execute(
-        stmt,
-        {"query_vector": vector_str}
-    )
+    # Generate embedding for query (cached across retrieval-cache invalidations)
+    embedding_task = _embed_query(query)
+    
+    # Tune the HNSW search breadth for this transaction only. SET does not
+    # accept bind parameters, so the transaction-local set_config() is used.
+    # An HNSW scan returns at most ef_search rows, so it must cover the shortlist.
+    # The round-trip is independent of the embedding, so the two overlap.
+    if is_postgresql:
+        query_embedding, _ = await asyncio.gather(
+            embedding_task,
+            session.execute(
+                text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+                {"ef_search": str(max(settings.hnsw_ef_search, params.get("candidates", 0)))},
+            ),
+        )
+    else:
+        query_embedding = await embedding_task
+    params["query_vector"] = query_embedding
+    
+    # The embedding is bound as a typed halfvec parameter; no string formatting
+    result = await session.execute(stmt, params)
     
-    policies = list(result.scalars().all())
+    policies = [
+        PolicySnapshot(
+            id=row.id,
+            title=row.title,
+            content=row.content,
+            category=row.category,
+        )
+        for row in result
+    ]
     
     logger.info(
         f"Retrieved {len(policies)} policies for query (top_k={top_k}, "
         f"category={category_filter or 'all'})"
     )
     
-    return policies
+    # No await between the version check and the insert, so this is atomic
+    # with respect to other coroutines on the event loop
+    if version == _cache_version:
+        _retrieval_cache[cache_key] = policies
+        if len(_retrieval_cache) > _CACHE_MAX_SIZE:
+            _retrieval_cache.popitem(last=False)
+    
+    return list(policies)
+
+
+async def retrieve_relevant_policies_batch(
+    session: AsyncSession,
+    queries: List[str],
+    top_k: int = 3,
+    category_filter: Optional[str] = None,
+) -> List[List[PolicySnapshot]]:
+    """
+    Retrieve relevant policy documents for several queries in one round-trip.
+    
+    Uncached queries are embedded in a single batch call and searched with one
+    statement that joins a VALUES list of query vectors LATERAL to a per-query
+    top_k index scan. The scan is a plain HNSW top_k, without the binary
+    shortlist, re-rank or distance cutoff of retrieve_relevant_policies, so
+    its results are cached under their own keys rather than shared with it.
+    
+    Args:
+        session: Database session
+        queries: Query texts to search for
+        top_k: Number of top results to return per query (default: 3)
+        category_filter: Optional category to filter results
+        
+    Returns:
+        One list of PolicySnapshot tuples per query, each ordered by relevance
+    """
+    normalized = [_normalize_query(query) for query in queries]
+    
+    results: Dict[str, List[PolicySnapshot]] = {}
+    for query in normalized:
+        cache_key = _batch_cache_key(query, top_k, category_filter)
+        cached = _retrieval_cache.get(cache_key)
+        if cached is not None:
+            _retrieval_cache.move_to_end(cache_key)
+            results[query] = cached
+    
+    # dict.fromkeys de-duplicates while keeping the callers' order
+    pending = [query for query in dict.fromkeys(normalized) if query not in results]
+    
+    if pending:
+        version = _cache_version
+        
+        if session.bind.dialect.name == "postgresql":
+            embeddings, _ = await asyncio.gather(
+                _embed_queries(pending),
+                session.execute(
+                    text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+                    {"ef_search": str(settings.hnsw_ef_search)},
+                ),
+            )
+        else:
+            embeddings = await _embed_queries(pending)
+        
+        query_vectors = values(
+            column("qid", Integer),
+            column("query_vector", HALFVEC(384)),
+            name="q",
+        ).data(list(enumerate(embeddings)))
+        
+        # VALUES parameters carry no column type, so cast for the <#> operator
+        neg_inner_product = PolicyDocument.embedding.op("<#>", return_type=Float)(
+            cast(query_vectors.c.query_vector, HALFVEC(384))
+        )
+        nearest = (
+            select(
+                PolicyDocument.id,
+                PolicyDocument.title,
+                func.substr(PolicyDocument.content, 1, POLICY_EXCERPT_CHARS).label("content"),
+                PolicyDocument.category,
+            )
+            .order_by(neg_inner_product)
+            .limit(bindparam("top_k", type_=Integer))
+        )
+        if category_filter:
+            nearest = nearest.where(PolicyDocument.category == category_filter)
+        nearest = nearest.lateral("nearest")
+        
+        stmt = select(query_vectors.c.qid, nearest).select_from(
+            query_vectors.join(nearest, true())
+        )
+        
+        result = await session.execute(stmt, {"top_k": top_k})
+        
+        # Rows of each lateral scan arrive in distance order
+        grouped: List[List[PolicySnapshot]] = [[] for _ in pending]
+        for row in result:
+            grouped[row.qid].append(
+                PolicySnapshot(
+                    id=row.id,
+                    title=row.title,
+                    content=row.content,
+                    category=row.category,
+                )
+            )
+        
+        logger.info(
+            f"Retrieved policies for {len(pending)} queries in one batch "
+            f"(top_k={top_k}, category={category_filter or 'all'})"
+        )
+        
+        for query, policies in zip(pending, grouped):
+            results[query] = policies
+            if version == _cache_version:
+                _retrieval_cache[_batch_cache_key(query, top_k, category_filter)] = policies
+        while len(_retrieval_cache) > _CACHE_MAX_SIZE:
+            _retrieval_cache.popitem(last=False)
+    
+    return [list(results[query]) for query in normalized]
 
 
 async def retrieve_policies_by_category(
@@ -87,27 +442,41 @@ async def retrieve_policies_by_category(
     Returns:
         List of PolicyDocument instances
     """
-    result = await session.execute(
+    result = await session.scalars(
         select(PolicyDocument)
         .where(PolicyDocument.category == category)
         .limit(limit)
     )
     
-    return list(result.scalars().all())
+    return result.all()
 
 
 async def get_all_policy_categories(session: AsyncSession) -> List[str]:
     """
     Get all distinct policy categories in the database.
     
+    Categories change only with policy writes, so the list is cached for
+    _CATEGORIES_TTL_SECONDS and dropped by invalidate_policy_cache().
+    
     Args:
         session: Database session
         
     Returns:
         List of category names
     """
-    result = await session.execute(
+    global _categories_cache
+    if _categories_cache is not None:
+        loaded_at, categories = _categories_cache
+        if time.monotonic() - loaded_at < _CATEGORIES_TTL_SECONDS:
+            return list(categories)
+    
+    version = _cache_version
+    result = await session.scalars(
         select(PolicyDocument.category).distinct()
     )
+    categories = result.all()
+    
+    if version == _cache_version:
+        _categories_cache = (time.monotonic(), categories)
     
-    return [row[0] for row in result.fetchall()]
+    return list(categories)
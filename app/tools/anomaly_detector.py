@@ -4,18 +4,38 @@ Identifies anomalous transactions using rule-based heuristics.
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
 from uuid import UUID
 
+import numpy as np
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Transaction
 
 logger = logging.getLogger(__name__)
 
+# Merchant name prefixes marking a foreign merchant. All are three characters,
+# so a single slice and set lookup replaces a startswith() per prefix.
+FOREIGN_MERCHANT_PREFIXES = frozenset(("UK-", "FR-", "DE-", "JP-", "AU-"))
+_FOREIGN_PREFIX_LEN = 3
+_FOREIGN_PREFIX_ARRAY = np.array(sorted(FOREIGN_MERCHANT_PREFIXES))
+
+# Scoring rules shared by the scalar and vectorized scorers. Weights are
+# added in this order by both, so their float sums match exactly.
+_AMOUNT_DEVIATION_WEIGHT = 0.3
+_AMOUNT_DEVIATION_Z = 3
+_STD_EPSILON = 0.01  # Keeps the z-score finite for constant amounts
+_ODD_HOUR_WEIGHT = 0.2
+_ODD_HOUR_START, _ODD_HOUR_END = 2, 5  # Inclusive
+_FOREIGN_MERCHANT_WEIGHT = 0.15
+_LABELED_ANOMALY_WEIGHT = 0.35
+_LARGE_AMOUNT_WEIGHT = 0.1
+_LARGE_AMOUNT_MULTIPLE = 5
+_MAX_SCORE = 1.0
+
 
 class DetectAnomaliesInput(BaseModel):
     """Input schema for anomaly detection."""
@@ -68,12 +88,21 @@ class AnomalyDetector:
     - Pre-labeled anomalies (is_anomaly flag)
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, window_end: Optional[datetime] = None):
+        """
+        Initialize the anomaly detector.
+        
+        Args:
+            session: Database session
+            window_end: Fixed end of the look-back window; the current time
+                when not given
+        """
         self.session = session
+        self.window_end = window_end
 
     def _calculate_anomaly_score(
         self,
-        transaction: Transaction,
+        transaction: Row,
         avg_amount: float,
         std_amount: float,
     ) -> tuple[float, List[str]]:
@@ -88,37 +117,70 @@ class AnomalyDetector:
         
         # Check amount deviation (30% weight)
         if avg_amount > 0:
-            z_score = abs((transaction.amount - avg_amount) / (std_amount + 0.01))
-            if z_score > 3:
-                score += 0.3
+            z_score = abs((transaction.amount - avg_amount) / (std_amount + _STD_EPSILON))
+            if z_score > _AMOUNT_DEVIATION_Z:
+                score += _AMOUNT_DEVIATION_WEIGHT
                 reasons.append(f"Amount {z_score:.1f} standard deviations from mean")
         
         # Check time of day (20% weight)
         hour = transaction.timestamp.hour
-        if 2 <= hour <= 5:
-            score += 0.2
+        if _ODD_HOUR_START <= hour <= _ODD_HOUR_END:
+            score += _ODD_HOUR_WEIGHT
             reasons.append(f"Transaction at unusual hour ({hour}:00)")
         
         # Check for foreign merchant (15% weight)
-        if any(transaction.merchant.startswith(prefix) for prefix in ["UK-", "FR-", "DE-", "JP-", "AU-"]):
-            score += 0.15
+        if transaction.merchant[:_FOREIGN_PREFIX_LEN] in FOREIGN_MERCHANT_PREFIXES:
+            score += _FOREIGN_MERCHANT_WEIGHT
             reasons.append("Foreign merchant")
         
         # Check database label (35% weight)
         if transaction.is_anomaly:
-            score += 0.35
+            score += _LABELED_ANOMALY_WEIGHT
             reasons.append("Flagged in database as anomaly")
         
         # Check unusually large amount (additional factor)
-        if transaction.amount > avg_amount * 5:
-            score += 0.1
-            reasons.append(f"Amount >5x average (${avg_amount:.2f})")
+        if transaction.amount > avg_amount * _LARGE_AMOUNT_MULTIPLE:
+            score += _LARGE_AMOUNT_WEIGHT
+            reasons.append(f"Amount >{_LARGE_AMOUNT_MULTIPLE}x average (${avg_amount:.2f})")
         
         # Cap at 1.0
-        score = min(score, 1.0)
+        score = min(score, _MAX_SCORE)
         
         return score, reasons
 
+    @staticmethod
+    def _score_all(
+        transactions: Sequence[Row],
+        amounts: np.ndarray,
+        avg_amount: float,
+        std_amount: float,
+    ) -> np.ndarray:
+        """
+        Vectorized anomaly scores for all transactions.
+        
+        Applies the same weights, in the same order, as _calculate_anomaly_score,
+        so the scores are identical; reasons are left to the scalar path.
+        
+        Returns:
+            Array of scores in [0, 1], one per transaction
+        """
+        count = len(transactions)
+        hours = np.fromiter((t.timestamp.hour for t in transactions), dtype=np.int8, count=count)
+        flagged = np.fromiter((t.is_anomaly for t in transactions), dtype=np.bool_, count=count)
+        prefixes = np.array([t.merchant[:_FOREIGN_PREFIX_LEN] for t in transactions])
+        
+        scores = np.zeros(count)
+        if avg_amount > 0:
+            z_scores = np.abs((amounts - avg_amount) / (std_amount + _STD_EPSILON))
+            scores += _AMOUNT_DEVIATION_WEIGHT * (z_scores > _AMOUNT_DEVIATION_Z)
+        scores += _ODD_HOUR_WEIGHT * ((hours >= _ODD_HOUR_START) & (hours <= _ODD_HOUR_END))
+        scores += _FOREIGN_MERCHANT_WEIGHT * np.isin(prefixes, _FOREIGN_PREFIX_ARRAY)
+        scores += _LABELED_ANOMALY_WEIGHT * flagged
+        scores += _LARGE_AMOUNT_WEIGHT * (amounts > avg_amount * _LARGE_AMOUNT_MULTIPLE)
+        np.minimum(scores, _MAX_SCORE, out=scores)
+        
+        return scores
+
     async def execute(self, input_data: dict) -> dict:
         """
         Execute anomaly detection.
@@ -136,22 +198,30 @@ class AnomalyDetector:
         customer_id = UUID(validated_input.customer_id)
         
         # Calculate time range
-        end_time = datetime.now()
+        end_time = self.window_end or datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=validated_input.window_days)
         
-        # Query transactions
-        stmt = select(Transaction).where(
+        # Query only the scored columns as plain rows; no ORM instances are
+        # built or tracked in the identity map
+        stmt = select(
+            Transaction.id,
+            Transaction.amount,
+            Transaction.timestamp,
+            Transaction.merchant,
+            Transaction.category,
+            Transaction.is_anomaly,
+        ).where(
             Transaction.customer_id == customer_id,
             Transaction.timestamp >= start_time,
             Transaction.timestamp <= end_time,
         )
         
         result = await self.session.execute(stmt)
-        transactions = list(result.scalars().all())
+        transactions = result.all()
         
         if not transactions:
             # No transactions to analyze
-            output = DetectAnomaliesOutput(
+            output = DetectAnomaliesOutput.model_construct(
                 customer_id=validated_input.customer_id,
                 total_transactions=0,
                 anomalies_detected=0,
@@ -160,37 +230,42 @@ class AnomalyDetector:
             )
             return output.model_dump()
         
-        # Calculate baseline statistics
-        amounts = [t.amount for t in transactions]
-        avg_amount = sum(amounts) / len(amounts)
+        # Baseline statistics (population standard deviation) over one
+        # contiguous array, which the scoring below reuses
+        amounts = np.fromiter(
+            (t.amount for t in transactions), dtype=np.float64, count=len(transactions)
+        )
+        avg_amount = float(amounts.mean())
+        std_amount = float(amounts.std())
         
-        # Calculate standard deviation
-        variance = sum((x - avg_amount) ** 2 for x in amounts) / len(amounts)
-        std_amount = variance ** 0.5
+        # Score every transaction at once; only the few above the threshold
+        # go through the scalar path to collect their reasons
+        scores = self._score_all(transactions, amounts, avg_amount, std_amount)
         
         # Detect anomalies
         anomalies = []
-        for transaction in transactions:
-            score, reasons = self._calculate_anomaly_score(
+        flagged = np.flatnonzero(scores >= validated_input.threshold)
+        rounded_scores = np.round(scores[flagged], 3).tolist()
+        for index, score in zip(flagged, rounded_scores):
+            transaction = transactions[index]
+            _, reasons = self._calculate_anomaly_score(
                 transaction, avg_amount, std_amount
             )
-            
-            if score >= validated_input.threshold:
-                anomaly = AnomalyDetails(
-                    transaction_id=str(transaction.id),
-                    amount=transaction.amount,
-                    merchant=transaction.merchant,
-                    category=transaction.category,
-                    timestamp=transaction.timestamp,
-                    anomaly_score=round(score, 3),
-                    reasons=reasons,
-                )
-                anomalies.append(anomaly)
+            anomaly = AnomalyDetails.model_construct(
+                transaction_id=str(transaction.id),
+                amount=transaction.amount,
+                merchant=transaction.merchant,
+                category=transaction.category,
+                timestamp=transaction.timestamp,
+                anomaly_score=score,
+                reasons=reasons,
+            )
+            anomalies.append(anomaly)
         
         # Sort by score (highest first)
         anomalies.sort(key=lambda a: a.anomaly_score, reverse=True)
         
-        output = DetectAnomaliesOutput(
+        output = DetectAnomaliesOutput.model_construct(
             customer_id=validated_input.customer_id,
             total_transactions=len(transactions),
             anomalies_detected=len(anomalies),
@@ -198,5 +273,6 @@ class AnomalyDetector:
             detection_threshold=validated_input.threshold,
         )
         
-        # Validate output
+        # Output models are assembled from typed database values with
+        # model_construct, skipping re-validation; only serialize here
         return output.model_dump()
@@ -12,6 +12,32 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Mock-mode recommended actions and confidence, indexed by min(anomaly count, 3)
+_MOCK_RECOMMENDATIONS = (
+    (("continue_normal_monitoring",), 0.95),
+    (("flag_for_review", "notify_customer"), 0.85),
+    (("flag_for_review", "notify_customer"), 0.85),
+    (("escalate_to_analyst", "notify_customer", "enhanced_monitoring"), 0.65),
+)
+
+_ANOMALIES_HEADER = "\n\nDetected anomalies include:"
+_POLICY_CONTEXT = (
+    "\n\nThis analysis references {count} relevant internal policies "
+    "regarding transaction monitoring and fraud detection."
+)
+
+
+def _format_mock_anomaly(index: int, anomaly: dict) -> str:
+    """Format one anomaly line (plus its reasons) of the mock explanation."""
+    line = (
+        f"\n{index}. Transaction of ${anomaly.get('amount', 0):.2f} at "
+        f"{anomaly.get('merchant', 'Unknown')} (score: {anomaly.get('anomaly_score', 0):.2f})"
+    )
+    reasons = anomaly.get("reasons", [])
+    if reasons:
+        line += f"   Reasons: {', '.join(reasons)}"
+    return line
+
 
 class PolicyReference(BaseModel):
     """Reference to a policy document."""
@@ -61,6 +87,20 @@ class ExplanationDrafter:
 
     def __init__(self):
         self.use_mock = settings.use_mock_llm
+        self._client = None
+
+    def _get_client(self):
+        """
+        Return the OpenAI client, creating it on first use.
+        
+        The client owns an HTTP connection pool, so one instance is shared by
+        every call made through this drafter.
+        """
+        if self._client is None:
+            from openai import AsyncOpenAI
+            
+            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
+        return self._client
 
     def _draft_mock_explanation(
         self,
@@ -75,69 +115,40 @@ class ExplanationDrafter:
         total_transactions = transaction_summary.get("transaction_count", 0)
         
         # Build explanation
-        explanation_parts = []
-        
-        explanation_parts.append(
+        explanation = (
             f"Analysis of {total_transactions} transactions identified "
             f"{num_anomalies} potential {'anomaly' if num_anomalies == 1 else 'anomalies'}."
         )
         
         if anomalies:
-            explanation_parts.append("\n\nDetected anomalies include:")
-            for i, anomaly in enumerate(anomalies[:3], 1):  # Limit to top 3
-                amount = anomaly.get("amount", 0)
-                merchant = anomaly.get("merchant", "Unknown")
-                score = anomaly.get("anomaly_score", 0)
-                reasons = anomaly.get("reasons", [])
-                
-                explanation_parts.append(
-                    f"\n{i}. Transaction of ${amount:.2f} at {merchant} "
-                    f"(score: {score:.2f})"
-                )
-                if reasons:
-                    explanation_parts.append(f"   Reasons: {', '.join(reasons)}")
+            explanation += _ANOMALIES_HEADER + "".join(
+                _format_mock_anomaly(i, anomaly)
+                for i, anomaly in enumerate(anomalies[:3], 1)  # Limit to top 3
+            )
         
         # Add policy context
         if policies:
-            explanation_parts.append(
-                f"\n\nThis analysis references {len(policies)} relevant internal policies "
-                f"regarding transaction monitoring and fraud detection."
-            )
+            explanation += _POLICY_CONTEXT.format(count=len(policies))
         
         # Recommendations
-        recommendations = []
-        if num_anomalies == 0:
-            recommendations.append("continue_normal_monitoring")
-            confidence = 0.95
-        elif num_anomalies <= 2:
-            recommendations.append("flag_for_review")
-            recommendations.append("notify_customer")
-            confidence = 0.85
-        else:
-            recommendations.append("escalate_to_analyst")
-            recommendations.append("notify_customer")
-            recommendations.append("enhanced_monitoring")
-            confidence = 0.65
+        recommendations, confidence = _MOCK_RECOMMENDATIONS[min(num_anomalies, 3)]
         
         # Build policy references
-        policy_refs = []
-        for policy in policies[:3]:  # Top 3 policies
-            policy_refs.append(
-                PolicyReference(
-                    policy_id=policy.get("id", "unknown"),
-                    title=policy.get("title", "Unknown Policy"),
-                    category=policy.get("category", "general"),
-                )
+        policy_refs = [
+            PolicyReference(
+                policy_id=policy.get("id", "unknown"),
+                title=policy.get("title", "Unknown Policy"),
+                category=policy.get("category", "general"),
             )
-        
-        explanation = "".join(explanation_parts)
+            for policy in policies[:3]  # Top 3 policies
+        ]
         
         return DraftExplanationOutput(
             customer_id=customer_id,
             explanation=explanation,
             policy_references=policy_refs,
-            recommended_actions=recommendations,
-            confidence_score=round(confidence, 2),
+            recommended_actions=list(recommendations),
+            confidence_score=confidence,
         )
 
     async def _draft_llm_explanation(
@@ -150,9 +161,7 @@ class ExplanationDrafter:
         """Generate LLM-based explanation (requires OpenAI API key)."""
         
         try:
-            from openai import AsyncOpenAI
-            
-            client = AsyncOpenAI(api_key=settings.openai_api_key)
+            client = self._get_client()
             
             # Build prompt
             prompt_parts = [
@@ -5,6 +5,7 @@ Manages tool invocation, validation, and audit logging.
 
 import logging
 import time
+from datetime import datetime, timezone
 from typing import Any, Callable
 from uuid import UUID
 
@@ -39,6 +40,9 @@ class ToolRegistry:
         self.audit_logger = audit_logger
         self.guardrail_enforcer = guardrail_enforcer
         self._tools: dict[str, Callable] = {}
+        # Look-back windows end here for every tool in the run, so tools
+        # called moments apart see the same set of transactions
+        self.window_end = datetime.now(timezone.utc)
 
     def register_tool(self, name: str, func: Callable) -> None:
         """
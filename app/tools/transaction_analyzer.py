@@ -4,15 +4,17 @@ Analyzes customer transactions and generates statistical summaries.
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from uuid import UUID
 
+import numpy as np
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import Integer, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Transaction
+from app.config import settings
+from app.db.models import CustomerTxnStats, Transaction
 
 logger = logging.getLogger(__name__)
 
@@ -66,10 +68,25 @@ class TransactionAnalyzer:
     - Category breakdown
     - Merchant list
     - Anomaly count
+    
+    Serves requests from the pre-computed customer_txn_stats row when one
+    ends within txn_stats_max_age_seconds of the requested window end, and
+    aggregates transactions in SQL otherwise. Stats-served figures may
+    therefore differ from the live path by the transactions in that gap. The reported time range is the window
+    the figures were actually computed over.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, window_end: Optional[datetime] = None):
+        """
+        Initialize the transaction analyzer.
+        
+        Args:
+            session: Database session
+            window_end: Fixed end of the look-back window; the current time
+                when not given
+        """
         self.session = session
+        self.window_end = window_end
 
     async def execute(self, input_data: dict) -> dict:
         """
@@ -88,25 +105,52 @@ class TransactionAnalyzer:
         customer_id = UUID(validated_input.customer_id)
         
         # Calculate time range
-        end_time = datetime.now()
+        end_time = self.window_end or datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=validated_input.window_days)
         
-        # Query transactions
-        stmt = select(Transaction).where(
+        # Pre-computed aggregates only cover the full (anomalies included) window
+        if validated_input.include_anomalies:
+            stats = await self._get_fresh_stats(
+                customer_id, validated_input.window_days, end_time
+            )
+            if stats is not None:
+                return self._output_from_stats(validated_input, stats).model_dump()
+        
+        # Aggregate in the database: one row per category carries every
+        # statistic, so only the groups (not the transactions) cross the wire
+        in_window = [
             Transaction.customer_id == customer_id,
             Transaction.timestamp >= start_time,
             Transaction.timestamp <= end_time,
-        )
-        
+        ]
         if not validated_input.include_anomalies:
-            stmt = stmt.where(Transaction.is_anomaly == False)
+            in_window.append(Transaction.is_anomaly == False)
         
-        result = await self.session.execute(stmt)
-        transactions = list(result.scalars().all())
+        category_rows = (
+            await self.session.execute(
+                select(
+                    Transaction.category,
+                    func.count().label("n"),
+                    func.sum(Transaction.amount).label("total"),
+                    func.min(Transaction.amount).label("min_amount"),
+                    func.max(Transaction.amount).label("max_amount"),
+                    func.sum(cast(Transaction.is_anomaly, Integer)).label("anomalies"),
+                    func.min(Transaction.currency).label("currency"),
+                )
+                .where(*in_window)
+                .group_by(Transaction.category)
+            )
+        ).all()
+        
+        time_range = TimeRange.model_construct(
+            start=start_time,
+            end=end_time,
+            days=validated_input.window_days,
+        )
         
-        if not transactions:
+        if not category_rows:
             # Return empty analysis
-            output = AnalyzeTransactionsOutput(
+            output = AnalyzeTransactionsOutput.model_construct(
                 customer_id=validated_input.customer_id,
                 transaction_count=0,
                 total_amount=0.0,
@@ -116,50 +160,102 @@ class TransactionAnalyzer:
                 currency="USD",
                 category_breakdown={},
                 merchant_list=[],
-                time_range=TimeRange(
-                    start=start_time,
-                    end=end_time,
-                    days=validated_input.window_days,
-                ),
+                time_range=time_range,
                 anomaly_count=0,
             )
         else:
-            # Calculate statistics
-            amounts = [t.amount for t in transactions]
-            total_amount = sum(amounts)
-            
-            # Category breakdown
-            category_breakdown = {}
-            for t in transactions:
-                category_breakdown[t.category] = (
-                    category_breakdown.get(t.category, 0.0) + t.amount
-                )
-            
             # Unique merchants (limit to 20 for brevity)
-            merchants = list(set(t.merchant for t in transactions))[:20]
+            merchants = await self.session.scalars(
+                select(Transaction.merchant).where(*in_window).distinct().limit(20)
+            )
             
-            # Count anomalies
-            anomaly_count = sum(1 for t in transactions if t.is_anomaly)
+            count = sum(row.n for row in category_rows)
+            category_totals = np.fromiter(
+                (row.total for row in category_rows),
+                dtype=np.float64,
+                count=len(category_rows),
+            )
+            total_amount = float(category_totals.sum())
             
-            output = AnalyzeTransactionsOutput(
+            output = AnalyzeTransactionsOutput.model_construct(
                 customer_id=validated_input.customer_id,
-                transaction_count=len(transactions),
+                transaction_count=count,
                 total_amount=round(total_amount, 2),
-                average_amount=round(total_amount / len(transactions), 2),
-                min_amount=round(min(amounts), 2),
-                max_amount=round(max(amounts), 2),
-                currency=transactions[0].currency,
-                category_breakdown={
-                    k: round(v, 2) for k, v in category_breakdown.items()
-                },
-                merchant_list=merchants,
-                time_range=TimeRange(
-                    start=start_time,
-                    end=end_time,
-                    days=validated_input.window_days,
+                average_amount=round(total_amount / count, 2),
+                min_amount=round(min(row.min_amount for row in category_rows), 2),
+                max_amount=round(max(row.max_amount for row in category_rows), 2),
+                currency=category_rows[0].currency,
+                category_breakdown=dict(
+                    zip(
+                        (row.category for row in category_rows),
+                        np.round(category_totals, 2).tolist(),
+                    )
                 ),
-                anomaly_count=anomaly_count,
+                merchant_list=merchants.all(),
+                time_range=time_range,
+                anomaly_count=sum(row.anomalies or 0 for row in category_rows),
             )
         
-        # Validate output
+        # Output models are assembled from typed database values with
+        # model_construct, skipping re-validation; only serialize here
         return output.model_dump()
+
+    async def _get_fresh_stats(
+        self,
+        customer_id: UUID,
+        window_days: int,
+        window_end: datetime,
+    ) -> Optional[CustomerTxnStats]:
+        """
+        Fetch the customer's stats row if its window matches the requested one.
+        
+        The row's window must end within txn_stats_max_age_seconds (either
+        side, inclusive) of ``window_end``. This is not an exact match: the
+        refresher stamps its own time, so the figures may differ from a live
+        aggregate by up to that interval's worth of transactions.
+        
+        Args:
+            customer_id: Customer to look up
+            window_days: Requested look-back window
+            window_end: Requested end of the window
+            
+        Returns:
+            The stats row, or None when missing, off-window, or disabled
+        """
+        max_age = settings.txn_stats_max_age_seconds
+        if max_age <= 0:
+            return None
+        
+        tolerance = timedelta(seconds=max_age)
+        stmt = select(CustomerTxnStats).where(
+            CustomerTxnStats.customer_id == customer_id,
+            CustomerTxnStats.window_days == window_days,
+            CustomerTxnStats.window_end >= window_end - tolerance,
+            CustomerTxnStats.window_end <= window_end + tolerance,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _output_from_stats(
+        validated_input: AnalyzeTransactionsInput,
+        stats: CustomerTxnStats,
+    ) -> AnalyzeTransactionsOutput:
+        """Build the analysis output from a pre-computed stats row, over its own window."""
+        return AnalyzeTransactionsOutput.model_construct(
+            customer_id=validated_input.customer_id,
+            transaction_count=stats.transaction_count,
+            total_amount=round(stats.total_amount, 2),
+            average_amount=round(stats.total_amount / stats.transaction_count, 2),
+            min_amount=round(stats.min_amount, 2),
+            max_amount=round(stats.max_amount, 2),
+            currency=stats.currency,
+            category_breakdown=stats.category_breakdown,
+            merchant_list=stats.merchant_list,
+            time_range=TimeRange.model_construct(
+                start=stats.window_end - timedelta(days=stats.window_days),
+                end=stats.window_end,
+                days=stats.window_days,
+            ),
+            anomaly_count=stats.anomaly_count,
+        )
@@ -0,0 +1,90 @@
+"""
+Background workflow execution.
+Runs accepted workflow runs outside the HTTP request that created them.
+"""
+
+import logging
+from uuid import UUID
+
+from sqlalchemy import func, update
+
+from app.agent.graph import execute_workflow
+from app.db import async_session_maker
+from app.db.models import WorkflowRun, WorkflowStatus
+
+logger = logging.getLogger(__name__)
+
+
+async def run_workflow_task(
+    workflow_run_id: UUID,
+    customer_id: UUID,
+    input_params: dict,
+) -> None:
+    """
+    Execute a pending workflow run and record its outcome.
+
+    Opens its own session, since the request session that created the run is
+    closed by the time this executes.
+
+    Args:
+        workflow_run_id: ID of the PENDING WorkflowRun to execute
+        customer_id: Customer to analyze
+        input_params: Workflow input parameters
+    """
+    async with async_session_maker() as session:
+        # Targeted UPDATEs throughout: no WorkflowRun is loaded into the
+        # session, so commits never scan ORM state for dirty objects
+        marked = await session.execute(
+            update(WorkflowRun)
+            .where(WorkflowRun.id == workflow_run_id)
+            .values(status=WorkflowStatus.RUNNING)
+        )
+        if marked.rowcount == 0:
+            logger.error(f"Workflow run {workflow_run_id} not found; skipping execution")
+            return
+        await session.commit()
+
+        try:
+            result = await execute_workflow(
+                workflow_run_id=workflow_run_id,
+                customer_id=customer_id,
+                input_params=input_params,
+                session=session,
+            )
+
+            # Persist the audit trail first so the status UPDATE runs in its
+            # own transaction and NOW() reflects completion, not the start of
+            # the workflow's transaction
+            await session.commit()
+
+            # Update workflow run with result; execute_workflow reports a
+            # failed graph run as a result rather than raising
+            if result.get("status") == "failed":
+                outcome = {
+                    "status": WorkflowStatus.FAILED,
+                    "error_message": result.get("error"),
+                }
+            elif result.get("is_escalated"):
+                outcome = {"status": WorkflowStatus.ESCALATED}
+            else:
+                outcome = {"status": WorkflowStatus.COMPLETED}
+            await session.execute(
+                update(WorkflowRun)
+                .where(WorkflowRun.id == workflow_run_id)
+                .values(result=result, completed_at=func.now(), **outcome)
+            )
+            await session.commit()
+
+        except Exception as e:
+            logger.error(f"Workflow execution failed: {e}")
+            await session.rollback()
+            await session.execute(
+                update(WorkflowRun)
+                .where(WorkflowRun.id == workflow_run_id)
+                .values(
+                    status=WorkflowStatus.FAILED,
+                    error_message=str(e),
+                    completed_at=func.now(),
+                )
+            )
+            await session.commit()
@@ -0,0 +1,32 @@
+"""Defer the policy embedding HNSW index until policies are loaded
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Inserting every row into an existing HNSW graph costs far more than
+    # building the graph once over loaded rows, and migrations run before the
+    # app seeds. The index is built at startup instead, after seeding, by
+    # ensure_policy_embedding_indexes() with the parameters declared on the
+    # PolicyDocument model.
+    op.execute('DROP INDEX IF EXISTS ix_policy_documents_embedding_hnsw')
+
+
+def downgrade() -> None:
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_policy_documents_embedding_hnsw ON policy_documents '
+        'USING hnsw (embedding vector_cosine_ops)'
+    )
@@ -0,0 +1,34 @@
+"""Store policy embeddings as halfvec
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # fp16 halves row and index size; HNSW distance computation is memory-bound.
+    # No index to rebuild: the HNSW index is built after loading (see 002).
+    op.execute(
+        'ALTER TABLE policy_documents ALTER COLUMN embedding TYPE halfvec(384) '
+        'USING embedding::halfvec(384)'
+    )
+
+
+def downgrade() -> None:
+    # The halfvec operator class of the startup-built index blocks the change
+    op.execute('DROP INDEX IF EXISTS ix_policy_documents_embedding_hnsw')
+    op.execute(
+        'ALTER TABLE policy_documents ALTER COLUMN embedding TYPE vector(384) '
+        'USING embedding::vector(384)'
+    )
@@ -0,0 +1,30 @@
+"""Composite (workflow_run_id, timestamp) index on audit_events
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Audit reads are "events for one run in time order"; the composite index
+    # serves both the lookup and the sort, and subsumes the single-column index
+    op.create_index(
+        'ix_audit_events_run_ts', 'audit_events', ['workflow_run_id', 'timestamp']
+    )
+    op.drop_index('ix_audit_events_workflow_run_id', table_name='audit_events')
+
+
+def downgrade() -> None:
+    op.create_index('ix_audit_events_workflow_run_id', 'audit_events', ['workflow_run_id'])
+    op.drop_index('ix_audit_events_run_ts', table_name='audit_events')
@@ -0,0 +1,131 @@
+"""Partition transactions by month
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of partitions created before and after the current month; the
+# backfill covers the demo data's 90-day history window
+MONTHS_BACK = 12
+MONTHS_AHEAD = 3
+
+
+def _create_partition_function() -> None:
+    # Creates one partition per month between two dates (inclusive); used
+    # here and by the application's startup maintenance to stay ahead of time
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION create_monthly_partitions(
+            parent text, start_date date, end_date date
+        ) RETURNS void AS $$
+        DECLARE
+            month_start date := date_trunc('month', start_date)::date;
+        BEGIN
+            WHILE month_start <= end_date LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    parent || '_' || to_char(month_start, 'YYYY_MM'),
+                    parent,
+                    month_start,
+                    (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def _create_partitions(table: str, source: str) -> None:
+    # Cover every month present in the existing data (at least MONTHS_BACK)
+    # through MONTHS_AHEAD months from now; anything outside that lands in
+    # the default partition
+    op.execute(
+        f"""
+        SELECT create_monthly_partitions(
+            '{table}',
+            LEAST(
+                COALESCE((SELECT min(timestamp) FROM {source}), now()),
+                now() - interval '{MONTHS_BACK} months'
+            )::date,
+            (now() + interval '{MONTHS_AHEAD} months')::date
+        )
+        """
+    )
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+
+def upgrade() -> None:
+    _create_partition_function()
+
+    # transactions: partitioned tables need the partition key in the primary key
+    op.execute('ALTER TABLE transactions RENAME TO transactions_unpartitioned')
+    op.execute(
+        'ALTER TABLE transactions_unpartitioned '
+        'RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey'
+    )
+    op.execute(
+        """
+        CREATE TABLE transactions (
+            id UUID NOT NULL,
+            customer_id UUID NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
+            amount DOUBLE PRECISION NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            merchant VARCHAR(255) NOT NULL,
+            category VARCHAR(100) NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            is_anomaly BOOLEAN NOT NULL,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """
+    )
+    _create_partitions('transactions', 'transactions_unpartitioned')
+    op.execute('INSERT INTO transactions SELECT * FROM transactions_unpartitioned')
+    op.execute('DROP TABLE transactions_unpartitioned')
+    op.create_index('ix_transactions_customer_id', 'transactions', ['customer_id'])
+    op.create_index('ix_transactions_timestamp', 'transactions', ['timestamp'])
+
+    # audit_events stays unpartitioned: its reads select one run's trail by
+    # workflow_run_id alone, which partitioning by timestamp cannot prune
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE transactions RENAME TO transactions_partitioned')
+    op.execute('ALTER INDEX ix_transactions_customer_id RENAME TO ix_transactions_customer_id_partitioned')
+    op.execute('ALTER INDEX ix_transactions_timestamp RENAME TO ix_transactions_timestamp_partitioned')
+    op.execute(
+        'ALTER TABLE transactions_partitioned '
+        'RENAME CONSTRAINT transactions_pkey TO transactions_partitioned_pkey'
+    )
+    op.execute(
+        """
+        CREATE TABLE transactions (
+            id UUID NOT NULL PRIMARY KEY,
+            customer_id UUID NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
+            amount DOUBLE PRECISION NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            merchant VARCHAR(255) NOT NULL,
+            category VARCHAR(100) NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            is_anomaly BOOLEAN NOT NULL
+        )
+        """
+    )
+    op.execute('INSERT INTO transactions SELECT * FROM transactions_partitioned')
+    op.execute('DROP TABLE transactions_partitioned CASCADE')
+    op.create_index('ix_transactions_customer_id', 'transactions', ['customer_id'])
+    op.create_index('ix_transactions_timestamp', 'transactions', ['timestamp'])
+
+    op.execute('DROP FUNCTION IF EXISTS create_monthly_partitions(text, date, date)')
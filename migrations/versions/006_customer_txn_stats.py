@@ -0,0 +1,43 @@
+"""Pre-computed customer transaction stats
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per (customer, window); rebuilt periodically by the application
+    # so transaction analysis is a primary-key lookup instead of a range scan
+    op.create_table(
+        'customer_txn_stats',
+        sa.Column('customer_id', sa.UUID(), nullable=False),
+        sa.Column('window_days', sa.Integer(), nullable=False),
+        sa.Column('window_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('min_amount', sa.Float(), nullable=False),
+        sa.Column('max_amount', sa.Float(), nullable=False),
+        sa.Column('anomaly_count', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('category_breakdown', sa.JSON(), nullable=False),
+        sa.Column('merchant_list', sa.JSON(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('customer_id', 'window_days')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('customer_txn_stats')
@@ -0,0 +1,33 @@
+"""Extend the audit_events run index with id for keyset pagination
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The audit endpoint pages with ORDER BY (timestamp, id) and a row-value
+    # cursor; adding id as the tie-breaker lets the index drive both the
+    # seek and the sort. Supersedes ix_audit_events_run_ts.
+    op.create_index(
+        'ix_audit_events_run_ts_id', 'audit_events', ['workflow_run_id', 'timestamp', 'id']
+    )
+    op.drop_index('ix_audit_events_run_ts', table_name='audit_events')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_audit_events_run_ts', 'audit_events', ['workflow_run_id', 'timestamp']
+    )
+    op.drop_index('ix_audit_events_run_ts_id', table_name='audit_events')
@@ -0,0 +1,35 @@
+"""Covering run index on audit_events for the audit summary endpoint
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # INCLUDE the remaining AuditEventSummary columns so paging through a
+    # run's audit trail is an index-only scan. Supersedes ix_audit_events_run_ts_id.
+    op.create_index(
+        'ix_audit_events_run_ts_id_covering',
+        'audit_events',
+        ['workflow_run_id', 'timestamp', 'id'],
+        postgresql_include=['node_name', 'tool_name', 'duration_ms'],
+    )
+    op.drop_index('ix_audit_events_run_ts_id', table_name='audit_events')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_audit_events_run_ts_id', 'audit_events', ['workflow_run_id', 'timestamp', 'id']
+    )
+    op.drop_index('ix_audit_events_run_ts_id_covering', table_name='audit_events')
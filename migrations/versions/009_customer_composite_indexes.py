@@ -0,0 +1,41 @@
+"""Composite customer indexes on transactions and workflow_runs
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # "Recent transactions for a customer" is served by one index range scan
+    # in timestamp order; subsumes the single-column customer_id index
+    op.create_index(
+        'ix_transactions_customer_ts',
+        'transactions',
+        ['customer_id', sa.text('timestamp DESC')],
+    )
+    op.drop_index('ix_transactions_customer_id', table_name='transactions')
+
+    # Runs are looked up per customer and filtered by status
+    op.create_index(
+        'ix_workflow_runs_customer_status', 'workflow_runs', ['customer_id', 'status']
+    )
+    op.drop_index('ix_workflow_runs_customer_id', table_name='workflow_runs')
+
+
+def downgrade() -> None:
+    op.create_index('ix_workflow_runs_customer_id', 'workflow_runs', ['customer_id'])
+    op.drop_index('ix_workflow_runs_customer_status', table_name='workflow_runs')
+    op.create_index('ix_transactions_customer_id', 'transactions', ['customer_id'])
+    op.drop_index('ix_transactions_customer_ts', table_name='transactions')
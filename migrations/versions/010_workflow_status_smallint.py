@@ -0,0 +1,43 @@
+"""Store workflow_runs.status as a smallint code
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match _STATUS_CODES in app.db.models
+STATUS_CODES = {
+    'pending': 0,
+    'running': 1,
+    'completed': 2,
+    'escalated': 3,
+    'failed': 4,
+}
+
+
+def upgrade() -> None:
+    # Two bytes per row instead of a varchar; indexes on status are rebuilt
+    # by the type change
+    cases = ' '.join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES.items())
+    op.execute(
+        'ALTER TABLE workflow_runs ALTER COLUMN status TYPE SMALLINT '
+        f'USING CASE status {cases} END'
+    )
+
+
+def downgrade() -> None:
+    cases = ' '.join(f"WHEN {code} THEN '{name}'" for name, code in STATUS_CODES.items())
+    op.execute(
+        'ALTER TABLE workflow_runs ALTER COLUMN status TYPE VARCHAR(20) '
+        f'USING CASE status {cases} END'
+    )
@@ -0,0 +1,51 @@
+"""Store audit event payloads as JSONB with GIN indexes
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # JSONB is stored parsed, so reads skip re-parsing the text; payloads are
+    # already size-capped by the audit logger's sanitizer
+    op.execute(
+        'ALTER TABLE audit_events '
+        'ALTER COLUMN input_data TYPE JSONB USING input_data::jsonb, '
+        'ALTER COLUMN output_data TYPE JSONB USING output_data::jsonb'
+    )
+    # jsonb_path_ops indexes are smaller and serve @> containment queries
+    op.create_index(
+        'ix_audit_events_input_data_gin',
+        'audit_events',
+        ['input_data'],
+        postgresql_using='gin',
+        postgresql_ops={'input_data': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_audit_events_output_data_gin',
+        'audit_events',
+        ['output_data'],
+        postgresql_using='gin',
+        postgresql_ops={'output_data': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_output_data_gin', table_name='audit_events')
+    op.drop_index('ix_audit_events_input_data_gin', table_name='audit_events')
+    op.execute(
+        'ALTER TABLE audit_events '
+        'ALTER COLUMN input_data TYPE JSON USING input_data::json, '
+        'ALTER COLUMN output_data TYPE JSON USING output_data::json'
+    )
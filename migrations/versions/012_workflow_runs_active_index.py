@@ -0,0 +1,33 @@
+"""Partial index on non-terminal workflow runs
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Status codes from migration 010: pending=0, running=1, escalated=3.
+    # The index only holds runs still needing attention, so its size tracks
+    # the active workload rather than the full history.
+    op.create_index(
+        'ix_workflow_runs_active',
+        'workflow_runs',
+        ['customer_id', 'created_at'],
+        postgresql_where=sa.text('status IN (0, 1, 3)'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflow_runs_active', table_name='workflow_runs')
@@ -0,0 +1,42 @@
+"""Binary-quantized HNSW index on policy embeddings
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Expression index over the sign bits of each embedding (48 bytes per row
+    # instead of 768); the retriever shortlists by Hamming distance with it and
+    # re-ranks by exact cosine distance. Needs pgvector >= 0.7.
+    # Like the halfvec index (see 002), the HNSW graph is built once over
+    # loaded rows: here only if policies already exist, otherwise by
+    # ensure_policy_embedding_indexes() at startup, after seeding.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM policy_documents) THEN
+                CREATE INDEX IF NOT EXISTS ix_policy_documents_embedding_bin_hnsw
+                ON policy_documents USING hnsw
+                ((binary_quantize(embedding)::bit(384)) bit_hamming_ops);
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_policy_documents_embedding_bin_hnsw')
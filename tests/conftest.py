@@ -3,19 +3,40 @@ Pytest fixtures and configuration for testing.
 """
 
 import asyncio
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator, AsyncIterator
 
 import pytest
 import pytest_asyncio
+from fastapi import FastAPI
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from pytest_asyncio import is_async_test
+from sqlalchemy import create_mock_engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+try:
+    import uvloop
+except ImportError:  # installed by uvicorn[standard] everywhere but Windows
+    uvloop = None
 
 from app.config import settings
+from app.db import get_session, get_session_factory
 from app.db.base import Base
-from app.db.models import Customer, Transaction, PolicyDocument
+from app.db.models import (
+    AuditEvent,
+    Customer,
+    PolicyDocument,
+    Transaction,
+    WorkflowRun,
+    WorkflowStatus,
+)
+from app import worker
 from app.main import create_app
 from app.demo_data.customers import generate_customers
-from app.demo_data.transactions import generate_transactions
+from app.demo_data.seed import _column_rows
+from app.demo_data.transactions import generate_transaction_columns
 from app.demo_data.policies import generate_policy_documents
 
 
@@ -23,74 +44,187 @@ from app.demo_data.policies import generate_policy_documents
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+def _compile_schema_ddl() -> list[str]:
+    """
+    Render the CREATE statements create_all would emit for SQLite.
+    
+    A mock engine collects them without a database, honouring ddl_if (so the
+    PostgreSQL-only indexes are left out) and skipping the existence checks.
+    """
+    statements = []
+    
+    def _collect(sql, *multiparams, **params):
+        statements.append(str(sql.compile(dialect=mock_engine.dialect)))
+    
+    mock_engine = create_mock_engine("sqlite://", _collect)
+    Base.metadata.create_all(mock_engine, checkfirst=False)
+    return statements
+
+
+# Compiled once per process; every test engine replays the same script
+_SCHEMA_DDL = _compile_schema_ddl()
+
+
+def pytest_collection_modifyitems(items):
+    """Run every async test on the session event loop the fixtures use."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create event loop for async tests."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Event loop policy for async tests (uvloop when available)."""
+    if uvloop is not None:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
 
 
-@pytest_asyncio.fixture
-async def test_engine():
-    """Create test database engine."""
+async def _create_test_engine() -> AsyncEngine:
+    """Create an in-memory test engine with the schema and SAVEPOINT support."""
+    # Every connection of an in-memory SQLite database is a separate database,
+    # so all sessions must share the single connection StaticPool holds
     engine = create_async_engine(
         TEST_DATABASE_URL,
         echo=False,
+        poolclass=StaticPool,
         connect_args={"check_same_thread": False},
     )
     
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # The sqlite3 driver's own transaction handling breaks SAVEPOINTs, so
+    # disable it and let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
     
-    yield engine
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
     
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+        for statement in _SCHEMA_DDL:
+            await conn.exec_driver_sql(statement)
     
+    return engine
+
+
+@asynccontextmanager
+async def _rollback_session(engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    """
+    Open a session whose work is discarded when the context exits.
+    
+    Commits inside the context release a SAVEPOINT rather than the outer
+    transaction, which is rolled back at the end.
+    """
+    async with engine.connect() as conn:
+        await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await conn.rollback()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def test_engine():
+    """
+    Create the test database engine and schema once per test run.
+    
+    The in-memory database lives as long as the engine, so no drop_all is
+    needed; per-test isolation comes from test_session's rollback.
+    """
+    engine = await _create_test_engine()
+    yield engine
     await engine.dispose()
 
 
 @pytest_asyncio.fixture
 async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
-    """Create test database session."""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
-    
-    async with async_session() as session:
+    """Create a test database session isolated in a rolled-back transaction."""
+    async with _rollback_session(test_engine) as session:
         yield session
 
 
-@pytest_asyncio.fixture
-async def seeded_session(test_session: AsyncSession) -> AsyncSession:
-    """Create session with seeded test data."""
-    # Generate and add test data
-    customers = generate_customers(count=10)
-    test_session.add_all(customers)
-    await test_session.flush()
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def seeded_engine():
+    """
+    Create a second in-memory database seeded once per test run.
     
-    transactions = generate_transactions(customers=customers, total_count=100)
-    test_session.add_all(transactions)
-    await test_session.flush()
+    Acts as a template: tests reach it only through seeded_session, whose
+    changes are rolled back, so every test sees the same seeded rows.
+    """
+    engine = await _create_test_engine()
     
+    # Generate test data; primary keys are assigned by the generators, so
+    # the rows can be inserted with Core executemany and no flushes
+    customers = generate_customers(count=10)
+    # Transactions come as columns and are zipped straight into row dicts,
+    # without building a Transaction instance per row
+    transactions = generate_transaction_columns(
+        customer_ids=[customer.id for customer in customers],
+        total_count=100,
+    )
+    transaction_rows = [
+        dict(zip(transactions, record)) for record in zip(*transactions.values())
+    ]
     policies = generate_policy_documents()
-    test_session.add_all(policies)
-    await test_session.flush()
     
-    await test_session.commit()
+    async with AsyncSession(engine) as session:
+        await session.execute(insert(Customer), _column_rows(customers))
+        await session.execute(insert(Transaction), transaction_rows)
+        await session.execute(insert(PolicyDocument), _column_rows(policies))
+        await session.commit()
     
-    return test_session
+    yield engine
+    await engine.dispose()
 
 
 @pytest_asyncio.fixture
-async def test_client() -> AsyncGenerator[AsyncClient, None]:
-    """Create test HTTP client."""
+async def seeded_session(seeded_engine) -> AsyncGenerator[AsyncSession, None]:
+    """Create session over the seeded test data, isolated by rollback."""
+    async with _rollback_session(seeded_engine) as session:
+        yield session
+
+
+@asynccontextmanager
+async def _no_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def test_app(test_engine) -> FastAPI:
+    """
+    Create one app shared by the whole test run.
+    
+    The production app with its startup and shutdown replaced by a no-op, so
+    nothing reaches the configured database. Request sessions come from the
+    test engine, each rolled back afterwards.
+    """
     app = create_app()
+    app.router.lifespan_context = _no_lifespan
+    
+    async def _get_test_session() -> AsyncGenerator[AsyncSession, None]:
+        async with _rollback_session(test_engine) as session:
+            yield session
+    
+    def _get_test_session_factory():
+        return lambda: _rollback_session(test_engine)
     
-    transport = ASGITransport(app=app)
+    app.dependency_overrides[get_session] = _get_test_session
+    app.dependency_overrides[get_session_factory] = _get_test_session_factory
+    return app
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def test_client(test_app) -> AsyncGenerator[AsyncClient, None]:
+    """Create one test HTTP client shared by the whole test run."""
+    transport = ASGITransport(app=test_app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
 
@@ -98,12 +232,76 @@ async def test_client() -> AsyncGenerator[AsyncClient, None]:
 @pytest_asyncio.fixture
 async def test_customer(test_session: AsyncSession) -> Customer:
     """Create a single test customer."""
+    # created_at is set here rather than by the server default, so every
+    # attribute is loaded without a refresh after the commit
     customer = Customer(
         name="Test Customer",
         email="test@example.com",
         account_type="checking",
+        created_at=datetime.now(timezone.utc),
     )
     test_session.add(customer)
     await test_session.commit()
-    await test_session.refresh(customer)
     return customer
+
+
+@pytest_asyncio.fixture
+async def audited_run(test_app, test_session, test_customer) -> WorkflowRun:
+    """
+    Create a completed workflow run with five audit events.
+    
+    While the fixture is active, requests are served from test_session, so
+    the API sees the rows without them being committed for other tests.
+    """
+    started_at = datetime.now(timezone.utc)
+    run = WorkflowRun(
+        customer_id=test_customer.id,
+        status=WorkflowStatus.COMPLETED,
+        created_at=started_at,
+        completed_at=started_at + timedelta(seconds=5),
+    )
+    test_session.add(run)
+    test_session.add_all(
+        AuditEvent(
+            workflow_run=run,
+            node_name=f"node_{i}",
+            duration_ms=i,
+            timestamp=started_at + timedelta(seconds=i),
+        )
+        for i in range(5)
+    )
+    await test_session.flush()
+    
+    @asynccontextmanager
+    async def _fixture_session() -> AsyncIterator[AsyncSession]:
+        yield test_session
+    
+    async def _get_fixture_session() -> AsyncGenerator[AsyncSession, None]:
+        yield test_session
+    
+    previous = dict(test_app.dependency_overrides)
+    test_app.dependency_overrides[get_session] = _get_fixture_session
+    test_app.dependency_overrides[get_session_factory] = lambda: _fixture_session
+    yield run
+    test_app.dependency_overrides.clear()
+    test_app.dependency_overrides.update(previous)
+
+
+@pytest_asyncio.fixture
+async def worker_session(monkeypatch, test_session: AsyncSession) -> AsyncSession:
+    """
+    Point the background worker's sessions at test_session's transaction.
+    
+    The worker opens (and commits) sessions of its own; these join the test
+    transaction through SAVEPOINTs, so its writes are visible to the test
+    and rolled back with it.
+    """
+    conn = await test_session.connection()
+    monkeypatch.setattr(
+        worker,
+        "async_session_maker",
+        lambda: AsyncSession(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        ),
+    )
+    return test_session
@@ -2,6 +2,7 @@
 Integration tests for API endpoints.
 """
 
+import orjson
 import pytest
 from httpx import AsyncClient
 
@@ -12,19 +13,31 @@ async def test_root_endpoint(test_client: AsyncClient):
     response = await test_client.get("/")
     
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert "project" in data
     assert "version" in data
     assert "disclaimer" in data
 
 
+@pytest.mark.asyncio
+async def test_openapi_schema_with_cors(test_client: AsyncClient):
+    """Test the OpenAPI schema is served and CORS headers are applied."""
+    response = await test_client.get(
+        "/openapi.json", headers={"Origin": "http://example.com"}
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "/api/v1/tasks/run" in orjson.loads(response.content)["paths"]
+
+
 @pytest.mark.asyncio
 async def test_list_customers(test_client: AsyncClient):
     """Test listing customers endpoint."""
     response = await test_client.get("/api/v1/customers")
 
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert "customers" in data
     assert "total" in data
     assert isinstance(data["customers"], list)
@@ -43,7 +56,7 @@ async def test_list_customers_pagination(test_client: AsyncClient):
     response = await test_client.get("/api/v1/customers?limit=5&offset=0")
 
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert len(data["customers"]) <= 5
 
 
@@ -53,7 +66,7 @@ async def test_health_endpoint(test_client: AsyncClient):
     response = await test_client.get("/api/v1/health")
     
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert data["status"] in ["healthy", "degraded"]
     assert "app_name" in data
     assert "version" in data
@@ -63,39 +76,121 @@ async def test_health_endpoint(test_client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_run_task_invalid_customer(test_client: AsyncClient):
-    """Test running task with invalid customer ID."""
-    response = await test_client.post(
-        "/api/v1/tasks/run",
-        json={
-            "customer_id": "invalid-uuid",
-            "analysis_window_days": 30,
-            "anomaly_threshold": 0.8,
-        },
-    )
+@pytest.mark.parametrize(
+    "method, url, json_body, expected_statuses",
+    [
+        pytest.param(
+            "POST",
+            "/api/v1/tasks/run",
+            {
+                "customer_id": "invalid-uuid",
+                "analysis_window_days": 30,
+                "anomaly_threshold": 0.8,
+            },
+            # Should fail validation
+            (400, 422),
+            id="run_task_invalid_customer",
+        ),
+        pytest.param(
+            "GET",
+            "/api/v1/tasks/00000000-0000-0000-0000-000000000000",
+            None,
+            (404,),
+            id="get_task_not_found",
+        ),
+        pytest.param(
+            "GET",
+            "/api/v1/tasks/00000000-0000-0000-0000-000000000000/audit",
+            None,
+            (404,),
+            id="get_audit_not_found",
+        ),
+    ],
+)
+async def test_error_paths(
+    test_client: AsyncClient,
+    method: str,
+    url: str,
+    json_body: dict | None,
+    expected_statuses: tuple[int, ...],
+):
+    """Test invalid input and non-existent tasks are rejected."""
+    response = await test_client.request(method, url, json=json_body)
+    
+    assert response.status_code in expected_statuses
+
+
+@pytest.mark.asyncio
+async def test_get_audit_default_page(test_client: AsyncClient, audited_run):
+    """Test the default page holds the short trail whole, in order."""
+    response = await test_client.get(f"/api/v1/tasks/{audited_run.id}/audit")
     
-    # Should fail validation
-    assert response.status_code in [400, 422]
+    assert response.status_code == 200
+    data = orjson.loads(response.content)
+    assert data["total_events"] == 5
+    assert [event["node_name"] for event in data["events"]] == [
+        f"node_{i}" for i in range(5)
+    ]
+    assert "X-Next-Cursor" not in response.headers
 
 
 @pytest.mark.asyncio
-async def test_get_task_not_found(test_client: AsyncClient):
-    """Test getting non-existent task."""
+async def test_get_audit_limit_capped(test_client: AsyncClient, audited_run):
+    """Test page sizes above the cap are rejected."""
     response = await test_client.get(
-        "/api/v1/tasks/00000000-0000-0000-0000-000000000000"
+        f"/api/v1/tasks/{audited_run.id}/audit", params={"limit": 501}
     )
     
-    assert response.status_code == 404
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_audit_pagination(test_client: AsyncClient, audited_run):
+    """Test limit and cursor paging walk the whole audit trail once."""
+    url = f"/api/v1/tasks/{audited_run.id}/audit"
+    node_names = []
+    params = {"limit": 2}
+    pages = 0
+    while True:
+        response = await test_client.get(url, params=params)
+        assert response.status_code == 200
+        data = orjson.loads(response.content)
+        assert len(data["events"]) <= 2
+        # The full trail length, not the page size
+        assert data["total_events"] == 5
+        node_names.extend(event["node_name"] for event in data["events"])
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "after": cursor}
+    
+    assert pages == 3
+    assert node_names == [f"node_{i}" for i in range(5)]
 
 
 @pytest.mark.asyncio
-async def test_get_audit_not_found(test_client: AsyncClient):
-    """Test getting audit trail for non-existent task."""
+async def test_get_audit_invalid_cursor(test_client: AsyncClient, audited_run):
+    """Test a malformed cursor is rejected."""
     response = await test_client.get(
-        "/api/v1/tasks/00000000-0000-0000-0000-000000000000/audit"
+        f"/api/v1/tasks/{audited_run.id}/audit", params={"after": "not-a-cursor"}
     )
     
-    assert response.status_code == 404
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stream_audit(test_client: AsyncClient, audited_run):
+    """Test the audit trail streams as one NDJSON line per event."""
+    response = await test_client.get(f"/api/v1/tasks/{audited_run.id}/audit/stream")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.content.splitlines()
+    assert len(lines) == 5
+    assert [orjson.loads(line)["node_name"] for line in lines] == [
+        f"node_{i}" for i in range(5)
+    ]
 
 
 # Note: Full end-to-end tests require a real database with pgvector
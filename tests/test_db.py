@@ -0,0 +1,43 @@
+"""
+Unit tests for the database schema and maintenance helpers.
+"""
+
+from sqlalchemy import create_mock_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.db.base import Base
+from app.db.maintenance import POLICY_EMBEDDING_INDEXES
+
+
+def _create_all_ddl(dialect_url: str) -> str:
+    """Render the DDL create_all emits for a dialect, without a database."""
+    statements = []
+    
+    def _collect(sql, *multiparams, **params):
+        statements.append(str(sql.compile(dialect=mock_engine.dialect)))
+    
+    mock_engine = create_mock_engine(dialect_url, _collect)
+    Base.metadata.create_all(mock_engine, checkfirst=False)
+    return "\n".join(statements)
+
+
+def test_create_all_skips_policy_hnsw_indexes():
+    """Test create_all leaves the HNSW indexes to be built after loading."""
+    ddl = _create_all_ddl("postgresql://")
+    
+    assert "CREATE TABLE policy_documents" in ddl
+    for index in POLICY_EMBEDDING_INDEXES:
+        assert index.name not in ddl
+
+
+def test_policy_hnsw_indexes_compile_for_ensure():
+    """Test the model's index definitions compile to the HNSW builds."""
+    ddl = "\n".join(
+        str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+        for index in POLICY_EMBEDDING_INDEXES
+    )
+    
+    assert "USING hnsw (embedding halfvec_ip_ops)" in ddl
+    assert "ef_construction = 64" in ddl
+    assert "bit_hamming_ops" in ddl
@@ -2,24 +2,39 @@
 Unit tests for workflow components.
 """
 
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Customer
+from app.config import settings
+from app.db.models import Customer, CustomerTxnStats, WorkflowRun, WorkflowStatus
 from app.tools.transaction_analyzer import TransactionAnalyzer, AnalyzeTransactionsInput
 from app.tools.anomaly_detector import AnomalyDetector, DetectAnomaliesInput
 from app.tools.explanation_drafter import ExplanationDrafter, DraftExplanationInput
-from app.guardrails.enforcement import GuardrailEnforcer, GuardrailViolation
+from app.guardrails.enforcement import (
+    GuardrailEnforcer,
+    GuardrailViolation,
+    validate_workflow_input,
+)
+from app.audit.logger import AuditLogger
+from app import worker
+
+# Built once so SQLAlchemy's compiled cache serves both tool tests
+_FIRST_CUSTOMER_ID = select(Customer.id).limit(1)
+
+_STATS_TOLERANCE = timedelta(seconds=settings.txn_stats_max_age_seconds)
 
 
 @pytest.mark.asyncio
 async def test_transaction_analyzer(seeded_session: AsyncSession):
     """Test transaction analyzer tool."""
     # Get a customer
-    customers = await seeded_session.execute(
-        "SELECT id FROM customers LIMIT 1"
-    )
-    customer_id = customers.scalar()
+    customer_id = await seeded_session.scalar(_FIRST_CUSTOMER_ID)
     
     if not customer_id:
         pytest.skip("No customers in test database")
@@ -40,14 +55,60 @@ async def test_transaction_analyzer(seeded_session: AsyncSession):
     assert isinstance(result["transaction_count"], int)
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "stats_offset, uses_stats",
+    [
+        (timedelta(0), True),
+        (_STATS_TOLERANCE - timedelta(seconds=1), True),
+        (_STATS_TOLERANCE + timedelta(seconds=1), False),
+        (timedelta(days=1), False),
+    ],
+    ids=[
+        "stats_at_window_end",
+        "stats_inside_tolerance",
+        "stats_outside_tolerance",
+        "stats_off_window",
+    ],
+)
+async def test_transaction_analyzer_stats_window(
+    seeded_session: AsyncSession, stats_offset: timedelta, uses_stats: bool
+):
+    """Test pre-computed stats are used only within the max-age tolerance of the window end."""
+    customer_id = await seeded_session.scalar(_FIRST_CUSTOMER_ID)
+    window_end = datetime.now(timezone.utc)
+    stats_window_end = window_end - stats_offset
+    seeded_session.add(
+        CustomerTxnStats(
+            customer_id=customer_id,
+            window_days=30,
+            window_end=stats_window_end,
+            transaction_count=12345,
+            total_amount=1.0,
+            min_amount=1.0,
+            max_amount=1.0,
+            anomaly_count=0,
+            currency="USD",
+            refreshed_at=window_end,
+        )
+    )
+    await seeded_session.flush()
+    
+    analyzer = TransactionAnalyzer(seeded_session, window_end=window_end)
+    result = await analyzer.execute({"customer_id": str(customer_id), "window_days": 30})
+    
+    assert (result["transaction_count"] == 12345) == uses_stats
+    # The reported window is the one the figures cover
+    # SQLite hands timestamps back without their UTC offset
+    reported_end = result["time_range"]["end"].replace(tzinfo=timezone.utc)
+    assert reported_end == (stats_window_end if uses_stats else window_end)
+
+
 @pytest.mark.asyncio
 async def test_anomaly_detector(seeded_session: AsyncSession):
     """Test anomaly detector tool."""
     # Get a customer
-    customers = await seeded_session.execute(
-        "SELECT id FROM customers LIMIT 1"
-    )
-    customer_id = customers.scalar()
+    customer_id = await seeded_session.scalar(_FIRST_CUSTOMER_ID)
     
     if not customer_id:
         pytest.skip("No customers in test database")
@@ -69,6 +130,50 @@ async def test_anomaly_detector(seeded_session: AsyncSession):
     assert isinstance(result["anomalies"], list)
 
 
+def _scoring_sample(amounts, hours, merchants, flags) -> list[SimpleNamespace]:
+    """Build transaction rows with just the attributes the scorers read."""
+    day = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            amount=amount,
+            timestamp=day.replace(hour=hour),
+            merchant=merchant,
+            is_anomaly=flag,
+        )
+        for amount, hour, merchant, flag in zip(amounts, hours, merchants, flags)
+    ]
+
+
+@pytest.mark.parametrize(
+    "transactions",
+    [
+        _scoring_sample(
+            [10.0, 12.0, 11.0, 9.0, 500.0, 13.0, 10.5, 11.5, 9.5, 12.5, 10.0, 11.0],
+            [9, 3, 14, 2, 4, 5, 6, 23, 1, 12, 18, 7],
+            ["Grocer", "UK-Shop", "FR-Cafe", "Cinema", "JP-Air", "Book",
+             "AU-Surf", "DE-Rail", "Pharmacy", "Bakery", "UKShop", "Fuel"],
+            [False, False, True, False, True, True, False, False, False, False, False, True],
+        ),
+        _scoring_sample([0.0, 0.0, 0.0], [1, 3, 12], ["UK-A", "Shop", "Shop"], [True, False, False]),
+        _scoring_sample([20.0] * 4, [2, 3, 4, 5], ["UK-A", "FR-B", "DE-C", "JP-D"], [True] * 4),
+    ],
+    ids=["mixed", "zero_average", "all_rules_capped"],
+)
+def test_anomaly_vectorized_scores_match_scalar(transactions):
+    """Test the vectorized scorer gives exactly the scalar scorer's scores."""
+    amounts = np.array([t.amount for t in transactions])
+    avg_amount, std_amount = float(amounts.mean()), float(amounts.std())
+    detector = AnomalyDetector(session=None)
+    
+    vectorized = AnomalyDetector._score_all(transactions, amounts, avg_amount, std_amount)
+    scalar = [
+        detector._calculate_anomaly_score(t, avg_amount, std_amount)[0]
+        for t in transactions
+    ]
+    
+    assert vectorized.tolist() == scalar
+
+
 @pytest.mark.asyncio
 async def test_explanation_drafter():
     """Test explanation drafter tool."""
@@ -109,6 +214,67 @@ async def test_explanation_drafter():
     assert 0.0 <= result["confidence_score"] <= 1.0
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "outcome, expected_status, expected_error",
+    [
+        ({"is_escalated": False}, WorkflowStatus.COMPLETED, None),
+        ({"is_escalated": True}, WorkflowStatus.ESCALATED, None),
+        ({"status": "failed", "error": "graph failed"}, WorkflowStatus.FAILED, "graph failed"),
+        (RuntimeError("worker crashed"), WorkflowStatus.FAILED, "worker crashed"),
+    ],
+    ids=["completed", "escalated", "failed_result", "exception"],
+)
+async def test_run_workflow_task(
+    monkeypatch,
+    worker_session: AsyncSession,
+    test_customer: Customer,
+    outcome,
+    expected_status: WorkflowStatus,
+    expected_error,
+):
+    """Test the background worker records each workflow outcome on the run."""
+    run = WorkflowRun(customer_id=test_customer.id, input_params={})
+    worker_session.add(run)
+    await worker_session.flush()
+    
+    async def _execute_workflow(**kwargs):
+        # The run is marked RUNNING (and committed) before execution starts
+        status = await kwargs["session"].scalar(
+            select(WorkflowRun.status).where(WorkflowRun.id == run.id)
+        )
+        assert status == WorkflowStatus.RUNNING
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    monkeypatch.setattr(worker, "execute_workflow", _execute_workflow)
+    
+    await worker.run_workflow_task(run.id, test_customer.id, {})
+    
+    status, completed_at, error_message = (
+        await worker_session.execute(
+            select(
+                WorkflowRun.status, WorkflowRun.completed_at, WorkflowRun.error_message
+            ).where(WorkflowRun.id == run.id)
+        )
+    ).one()
+    assert status == expected_status
+    assert completed_at is not None
+    assert error_message == expected_error
+
+
+@pytest.mark.asyncio
+async def test_run_workflow_task_missing_run(monkeypatch, worker_session: AsyncSession):
+    """Test the worker skips a run that does not exist without executing it."""
+    async def _execute_workflow(**kwargs):
+        raise AssertionError("workflow executed for a missing run")
+    
+    monkeypatch.setattr(worker, "execute_workflow", _execute_workflow)
+    
+    await worker.run_workflow_task(uuid4(), uuid4(), {})
+
+
 def test_guardrail_tool_allowlist():
     """Test guardrail tool allowlist enforcement."""
     enforcer = GuardrailEnforcer()
@@ -151,6 +317,74 @@ def test_guardrail_rate_limiting():
         enforcer.increment_tool_call()
 
 
+@pytest.mark.parametrize(
+    "customer_id, valid",
+    [
+        ("12345678-1234-1234-1234-123456789012", True),
+        ("12345678123412341234123456789012", True),
+        ("{12345678-1234-1234-1234-123456789012}", True),
+        ("urn:uuid:12345678-1234-1234-1234-123456789012", True),
+        ("invalid-uuid", False),
+        ("12345678-1234-1234-1234-12345678901", False),
+        (12345, False),
+    ],
+    ids=["canonical", "hex", "braces", "urn", "garbage", "short", "not_a_string"],
+)
+def test_workflow_input_customer_id(customer_id, valid: bool):
+    """Test customer_id accepts every form uuid.UUID() parses, and nothing else."""
+    if valid:
+        validate_workflow_input({"customer_id": customer_id})
+    else:
+        with pytest.raises(GuardrailViolation):
+            validate_workflow_input({"customer_id": customer_id})
+
+
+@pytest.mark.parametrize("padding", [0, 2000], ids=["fast_path", "slow_path"])
+@pytest.mark.parametrize(
+    "secret",
+    [
+        "Bearer " + "a" * 30,
+        "Bearer\n" + "a" * 30,
+        "Bearer\t" + "a" * 30,
+        "Bearer\u00a0" + "a" * 30,
+        "sk-" + "a" * 24,
+        "AKIA" + "A" * 16,
+    ],
+    ids=["bearer_space", "bearer_newline", "bearer_tab", "bearer_nbsp", "openai_key", "aws_key"],
+)
+def test_audit_sanitizer_redacts_secrets(secret: str, padding: int):
+    """Test credentials are redacted from audit payloads of any size."""
+    data = {"header": f"auth {secret} end", "padding": "x" * padding}
+    
+    sanitized = AuditLogger._sanitize_data(data)
+    
+    assert secret not in sanitized["header"]
+    assert "***REDACTED***" in sanitized["header"]
+
+
+@pytest.mark.parametrize("padding", [0, 2000], ids=["fast_path", "slow_path"])
+def test_audit_sanitizer_wraps_list_items(padding: int):
+    """Test list items keep their stored shape: scalars wrapped, None as {}."""
+    data = {
+        "items": ["a", 1, 2.5, True, None, {"k": "v"}, [3]],
+        "plain": "x",
+        "padding": "y" * padding,
+    }
+    
+    sanitized = AuditLogger._sanitize_data(data)
+    
+    assert sanitized["items"] == [
+        {"value": "a"},
+        {"value": 1},
+        {"value": 2.5},
+        {"value": True},
+        {},
+        {"k": "v"},
+        [{"value": 3}],
+    ]
+    assert sanitized["plain"] == "x"
+
+
 @pytest.mark.asyncio
 async def test_input_validation():
     """Test Pydantic input validation."""